@@ -0,0 +1,141 @@
+"""Compare the capture format with JSON lines of raw frames.
+
+Synthetic trade and orderBookL2_25 frames (random walk prices, monotonic timestamps) are written
+as JSON lines and as a capture file. Reports file sizes and decode throughput.
+
+Usage:
+    poetry run python ./benchmarks/capture_format.py
+"""
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append("./bybit_websocket")
+from capture import CaptureReader, CaptureWriter
+from venues.bybit import BybitAdapter
+from venues.events import Trade
+
+SYMBOL = "BTCUSDT"
+TICK_SIZE = 0.5
+SIZE_STEP = 0.001
+N_FRAMES = 100_000
+
+
+def book_item(price_ticks: int, side: str, size_steps: int = 0):
+    price = price_ticks * TICK_SIZE
+    item = {"price": f"{price:.2f}", "symbol": SYMBOL, "id": str(int(price * 10000)), "side": side}
+    if size_steps > 0:
+        item["size"] = round(size_steps * SIZE_STEP, 3)
+    return item
+
+
+def generate_frames():
+    rng = random.Random(0)
+    timestamp = 1645000000000
+    mid = 80000
+    frames = [{
+        "topic": f"orderBookL2_25.{SYMBOL}",
+        "type": "snapshot",
+        "data": {"order_book": [book_item(mid - 1 - i, "Buy", rng.randint(1, 5000)) for i in range(25)]
+                 + [book_item(mid + i, "Sell", rng.randint(1, 5000)) for i in range(25)]},
+        "timestamp_e6": str(timestamp * 1000),
+    }]
+    for _ in range(N_FRAMES):
+        timestamp += rng.randint(0, 50)
+        mid += rng.choice((-1, 0, 0, 1))
+        if rng.random() < 0.3:
+            frames.append({
+                "topic": f"trade.{SYMBOL}",
+                "data": [{
+                    "symbol": SYMBOL,
+                    "tick_direction": "PlusTick",
+                    "price": f"{mid * TICK_SIZE:.2f}",
+                    "size": round(rng.randint(1, 500) * SIZE_STEP, 3),
+                    "timestamp": "2022-02-16T08:26:40.000Z",
+                    "trade_time_ms": str(timestamp),
+                    "side": rng.choice(("Buy", "Sell")),
+                    "trade_id": str(uuid.uuid4()),
+                } for _ in range(rng.randint(1, 3))],
+            })
+        else:
+            side = rng.choice(("Buy", "Sell"))
+            offset = -rng.randint(1, 25) if side == "Buy" else rng.randint(0, 24)
+            frames.append({
+                "topic": f"orderBookL2_25.{SYMBOL}",
+                "type": "delta",
+                "data": {
+                    "delete": [],
+                    "update": [book_item(mid + offset, side, rng.randint(1, 5000))],
+                    "insert": [],
+                    "transactTimeE6": 0,
+                },
+                "cross_seq": str(rng.randint(0, 10 ** 10)),
+                "timestamp_e6": str(timestamp * 1000),
+            })
+    return frames
+
+
+def write_capture(path: str, lines) -> None:
+    adapter = BybitAdapter(bybit_ws=None)
+    with CaptureWriter(path, symbol=SYMBOL, tick_size=TICK_SIZE, size_step=SIZE_STEP) as writer:
+        for line in lines:
+            events = adapter.parse(line)
+            if len(events) > 0 and isinstance(events[0], Trade):
+                writer.write_trades(events)
+            else:
+                for book_delta in events:
+                    writer.write_book_delta(book_delta)
+
+
+def main():
+    frames = generate_frames()
+    lines = [json.dumps(frame) for frame in frames]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = os.path.join(tmpdir, "frames.jsonl")
+        gzip_path = json_path + ".gz"
+        capture_path = os.path.join(tmpdir, "frames.bwcap")
+
+        with open(json_path, "w") as f:
+            f.write("\n".join(lines))
+        with gzip.open(gzip_path, "wt") as f:
+            f.write("\n".join(lines))
+
+        start = time.perf_counter()
+        write_capture(capture_path, lines)
+        write_time = time.perf_counter() - start
+
+        json_size, gzip_size, capture_size = (os.path.getsize(path) for path in (json_path, gzip_path, capture_path))
+
+        start = time.perf_counter()
+        with open(json_path) as f:
+            n_json = sum(1 for line in f for _ in (json.loads(line),))
+        json_time = time.perf_counter() - start
+
+        with CaptureReader(capture_path) as reader:
+            n_events = len(reader)
+
+            start = time.perf_counter()
+            n_iterated = sum(1 for _ in reader)
+            iter_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            n_block_events = sum(len(block.kinds) for block in reader.iter_blocks())
+            block_time = time.perf_counter() - start
+        assert n_events == n_iterated == n_block_events
+
+    print(f"frames: {n_json}, events: {n_events}")
+    print(f"size   json {json_size / 1e6:.2f}MB, json.gz {gzip_size / 1e6:.2f}MB, capture {capture_size / 1e6:.2f}MB "
+          f"(ratio vs json {json_size / capture_size:.1f}x, vs json.gz {gzip_size / capture_size:.1f}x)")
+    print(f"write  capture (including json.loads and translation) {n_events / write_time / 1e6:.2f}M events/s")
+    print(f"decode json.loads {n_json / json_time / 1e6:.2f}M frames/s, "
+          f"capture events {n_events / iter_time / 1e6:.2f}M events/s, numpy blocks {n_events / block_time / 1e6:.2f}M events/s")
+
+
+if __name__ == "__main__":
+    main()
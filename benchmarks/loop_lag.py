@@ -0,0 +1,78 @@
+"""Compare event loop lag of sync `crud` and async `async_crud` calls.
+
+Usage:
+    poetry run python ./benchmarks/loop_lag.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+import sqlalchemy
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append("./bybit_websocket")
+from db import async_crud, crud, models
+from utils.loop_lag import LoopLagMonitor
+from venues.events import Trade
+
+SYMBOL = "BTCUSDT"
+N_MESSAGES = 200
+TICKS_PER_MESSAGE = 5
+
+
+def make_ticks(start_ms: int):
+    return [Trade(SYMBOL, str(uuid.uuid4()), start_ms + i * 100, 40000.0 + (i % 10) * 0.5, 0.001, "Buy") for i in range(TICKS_PER_MESSAGE)]
+
+
+async def run_sync_crud(db_path: str) -> float:
+    engine = sqlalchemy.create_engine(f"sqlite:///{db_path}")
+    SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    start_ms = int(time.time() * 1000)
+    start = time.perf_counter()
+    for i in range(N_MESSAGES):
+        with SessionLocal() as db:
+            crud.insert_tick_items(db=db, insert_items=make_ticks(start_ms + i * 1000), max_rows=1000)
+            crud.create_ohlcv_from_ticks(db, symbol=SYMBOL, max_rows=1000)
+        await asyncio.sleep(0.0)
+    engine.dispose()
+    return time.perf_counter() - start
+
+
+async def run_async_crud(db_path: str) -> float:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, autocommit=False, autoflush=False, expire_on_commit=False)
+    start_ms = int(time.time() * 1000)
+    start = time.perf_counter()
+    for i in range(N_MESSAGES):
+        async with AsyncSessionLocal() as db:
+            await async_crud.insert_tick_items(db=db, insert_items=make_ticks(start_ms + i * 1000), max_rows=1000)
+            await async_crud.create_ohlcv_from_ticks(db, symbol=SYMBOL, max_rows=1000)
+        await asyncio.sleep(0.0)
+    await engine.dispose()
+    return time.perf_counter() - start
+
+
+async def measure(name: str, runner) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "bench.db")
+        models.Base.metadata.create_all(sqlalchemy.create_engine(f"sqlite:///{db_path}"))
+
+        monitor = LoopLagMonitor(interval=0.005)
+        monitor_task = asyncio.create_task(monitor.run())
+        elapsed = await runner(db_path)
+        monitor_task.cancel()
+
+    print(f"{name:>10}: elapsed {elapsed:.2f}s, loop lag mean {monitor.mean_lag * 1000:.2f}ms, max {monitor.max_lag * 1000:.2f}ms ({monitor.samples} samples)")
+
+
+async def main():
+    await measure("sync crud", run_sync_crud)
+    await measure("async crud", run_async_crud)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
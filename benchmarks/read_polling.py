@@ -0,0 +1,90 @@
+"""Poll the read service from many clients while the market state is updated.
+
+Reports requests per second and how many responses were serialized (cache misses).
+
+Usage:
+    poetry run python ./benchmarks/read_polling.py
+"""
+import asyncio
+import sys
+import time
+import uuid
+
+sys.path.append("./bybit_websocket")
+from market_state import MarketState
+from read_service import ReadService
+from venues.events import BookDelta, Trade
+
+SYMBOL = "BTCUSDT"
+N_CLIENTS = 50
+DURATION = 3.0
+UPDATE_INTERVAL = 0.1
+PORT = 8081
+TARGETS = [
+    f"/candles?symbol={SYMBOL}&interval=5&limit=500",
+    f"/book?symbol={SYMBOL}&depth=25",
+    f"/trades?symbol={SYMBOL}&limit=100",
+]
+
+
+def book_snapshot(n: int) -> BookDelta:
+    bids = [(40000 - i * 0.5, 1.0) for i in range(n)]
+    asks = [(40000.5 + i * 0.5, 1.0) for i in range(n)]
+    return BookDelta(SYMBOL, int(time.time() * 1000), True, bids, asks)
+
+
+def trade(timestamp: int) -> Trade:
+    return Trade(SYMBOL, str(uuid.uuid4()), timestamp, 40000.0, 0.001, "Buy")
+
+
+async def update_market_state(market_state: MarketState, stop_at: float) -> int:
+    timestamp = int(time.time() * 1000) - 3600 * 1000
+    updates = 0
+    while time.perf_counter() < stop_at:
+        timestamp += 5000
+        market_state.add_trades([trade(timestamp)])
+        market_state.apply_book_delta(BookDelta(SYMBOL, timestamp, False, [(40000.0, float(updates % 10 + 1))], []))
+        updates += 1
+        await asyncio.sleep(UPDATE_INTERVAL)
+    return updates
+
+
+async def poll(stop_at: float) -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+    requests = 0
+    while time.perf_counter() < stop_at:
+        target = TARGETS[requests % len(TARGETS)]
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        content_length = 0
+        while True:
+            line = await reader.readline()
+            if line == b"\r\n":
+                break
+            if line.lower().startswith(b"content-length:"):
+                content_length = int(line.split(b":")[1])
+        await reader.readexactly(content_length)
+        requests += 1
+    writer.close()
+    return requests
+
+
+async def main():
+    market_state = MarketState()
+    market_state.apply_book_delta(book_snapshot(200))
+    start = int(time.time() * 1000) - 7200 * 1000
+    market_state.add_trades([trade(start + i * 1000) for i in range(3000)])
+
+    read_service = ReadService(market_state, port=PORT)
+    server = await read_service.start()
+    stop_at = time.perf_counter() + DURATION
+    updates, *requests = await asyncio.gather(update_market_state(market_state, stop_at), *[poll(stop_at) for _ in range(N_CLIENTS)])
+    server.close()
+
+    n_requests = sum(requests)
+    print(f"{N_CLIENTS} clients, {n_requests / DURATION:.0f} req/s, {updates} updates")
+    print(f"serialized responses: {read_service.cache_misses}, cached responses: {read_service.cache_hits}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""Replay recorded frames through every venue adapter.
+
+`benchmarks/frames/{venue}.jsonl` hold frames of the same market in the frame shapes of each venue.
+Each file is replayed through its adapter into the board and candle stages, and the results must be
+identical across venues. Then the translation throughput of each adapter is measured.
+
+Usage:
+    poetry run python ./benchmarks/replay_adapters.py
+"""
+import os
+import sys
+import time
+
+sys.path.append("./bybit_websocket")
+from bars import BarBuilder
+from market_state import MarketState
+from venues.bybit import BybitAdapter
+from venues.bybit_v5 import BybitV5Adapter
+from venues.events import BookDelta, Trade
+
+SYMBOL = "BTCUSDT"
+FRAMES_DIR = os.path.join(os.path.dirname(__file__), "frames")
+ADAPTERS = [BybitAdapter(bybit_ws=None), BybitV5Adapter()]
+N_REPEAT = 20000
+
+
+def load_frames(adapter):
+    with open(os.path.join(FRAMES_DIR, f"{adapter.name}.jsonl")) as f:
+        return [line for line in f.read().splitlines() if line]
+
+
+def replay(adapter, frames):
+    market_state = MarketState()
+    bar_builder = BarBuilder(SYMBOL, interval_ms=5000, allowed_lateness_ms=1000, now_ms=lambda: 0)
+    events, bar_events = [], []
+    for frame in frames:
+        for event in adapter.parse(frame):
+            events.append(event)
+            if isinstance(event, Trade):
+                market_state.add_trades([event])
+                bar_events.extend(bar_builder.add_trades([event]))
+            elif isinstance(event, BookDelta):
+                market_state.apply_book_delta(event)
+
+    return {
+        "trades": [event for event in events if isinstance(event, Trade)],
+        "bids": market_state.get_board(SYMBOL, side="Buy", depth=25),
+        "asks": market_state.get_board(SYMBOL, side="Sell", depth=25),
+        "candles": market_state.get_candles(SYMBOL, interval=5, limit=100),
+        "bars": bar_events,
+    }
+
+
+def main():
+    results = {}
+    for adapter in ADAPTERS:
+        frames = load_frames(adapter)
+        results[adapter.name] = replay(adapter, frames)
+
+        start = time.perf_counter()
+        n_events = 0
+        for _ in range(N_REPEAT):
+            for frame in frames:
+                n_events += len(adapter.parse(frame))
+        elapsed = time.perf_counter() - start
+        print(f"{adapter.name:>10}: {len(frames) * N_REPEAT / elapsed / 1e3:.0f}k frames/s, {n_events / elapsed / 1e3:.0f}k events/s")
+
+    expected = results[ADAPTERS[0].name]
+    assert expected["bids"][0] == (40000.5, 0.2), expected["bids"]
+    assert expected["asks"][0] == (40001.0, 0.9), expected["asks"]
+    assert len(expected["trades"]) == 7, expected["trades"]
+    # The trade at 4.8s arrives after the one at 5.2s, and is the close of the first bar.
+    assert [(bar.timestamp % 10000, bar.close) for bar in expected["bars"]] == [(0, 40000.5), (5000, 40002.0)], expected["bars"]
+    for name, result in results.items():
+        for key in expected:
+            assert result[key] == expected[key], f"{name}: {key} differs.\n{result[key]}\n{expected[key]}"
+    print(f"replayed results are identical across {', '.join(results)}")
+
+
+if __name__ == "__main__":
+    main()
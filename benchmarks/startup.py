@@ -0,0 +1,101 @@
+"""Measure collector startup against a local stub server.
+
+The collector (`bybit_websocket/connect.py`) is started as a subprocess pointed at a local
+websocket server which answers the subscription with one trade frame.
+
+- time-to-subscribe: process start -> subscribe frame received by the stub server.
+- time-to-first-message: process start -> the first tick row is stored in sqlite.
+
+Usage:
+    poetry run python ./benchmarks/startup.py
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import websockets
+
+N_RUNS = 5
+HOST = "127.0.0.1"
+PORT = 8765
+COLLECTOR = os.path.abspath("./bybit_websocket/connect.py")
+
+
+def trade_frame() -> str:
+    return json.dumps({
+        "topic": "trade.BTCUSDT",
+        "data": [{
+            "symbol": "BTCUSDT",
+            "tick_direction": "PlusTick",
+            "price": "40000.00",
+            "size": 0.001,
+            "timestamp": "2022-02-20T00:00:00.000Z",
+            "trade_time_ms": str(int(time.time() * 1000)),
+            "side": "Buy",
+            "trade_id": str(uuid.uuid4()),
+        }],
+    })
+
+
+def count_ticks(db_path: str) -> int:
+    try:
+        with sqlite3.connect(db_path) as conn:
+            return conn.execute("select count(*) from tick").fetchone()[0]
+    except sqlite3.OperationalError:
+        # Database or table is not created yet.
+        return 0
+
+
+async def measure_once() -> tuple:
+    subscribed = asyncio.get_running_loop().create_future()
+
+    async def handler(ws, path):
+        try:
+            async for message in ws:
+                if json.loads(message).get("op") == "subscribe":
+                    if not subscribed.done():
+                        subscribed.set_result(time.perf_counter())
+                    await ws.send(json.dumps({"success": True, "ret_msg": "", "request": json.loads(message)}))
+                    await ws.send(trade_frame())
+        except websockets.exceptions.ConnectionClosed:
+            # The collector is terminated without closing handshake.
+            pass
+
+    async with websockets.serve(handler, HOST, PORT):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            env = dict(os.environ, BYBIT_API_KEY="dummy", BYBIT_SECRET_KEY="dummy", BYBIT_WS_BASE_URL=f"ws://{HOST}:{PORT}")
+            start = time.perf_counter()
+            proc = subprocess.Popen([sys.executable, COLLECTOR], cwd=tmpdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                subscribed_at = await asyncio.wait_for(subscribed, timeout=30)
+                db_path = os.path.join(tmpdir, "example.db")
+                while count_ticks(db_path) == 0:
+                    await asyncio.sleep(0.001)
+                stored_at = time.perf_counter()
+            finally:
+                proc.terminate()
+                proc.wait()
+
+    return subscribed_at - start, stored_at - start
+
+
+async def main():
+    to_subscribe, to_first_message = [], []
+    for _ in range(N_RUNS):
+        subscribe_time, first_message_time = await measure_once()
+        to_subscribe.append(subscribe_time)
+        to_first_message.append(first_message_time)
+
+    print(f"time-to-subscribe     median {statistics.median(to_subscribe) * 1000:.1f}ms (min {min(to_subscribe) * 1000:.1f}ms)")
+    print(f"time-to-first-message median {statistics.median(to_first_message) * 1000:.1f}ms (min {min(to_first_message) * 1000:.1f}ms)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,41 @@
+"""Measure the cost of a tracer span while tracing is disabled and enabled.
+
+Usage:
+    poetry run python ./benchmarks/tracing_overhead.py
+"""
+import sys
+import time
+
+sys.path.append("./bybit_websocket")
+from utils.tracing import Tracer
+
+N = 1_000_000
+
+
+def bare() -> float:
+    start = time.perf_counter()
+    for _ in range(N):
+        pass
+    return time.perf_counter() - start
+
+
+def with_span(tracer: Tracer) -> float:
+    start = time.perf_counter()
+    for _ in range(N):
+        with tracer.span("stage"):
+            pass
+    return time.perf_counter() - start
+
+
+def main():
+    base = bare()
+    tracer = Tracer()
+    disabled = with_span(tracer)
+    tracer.enable()
+    enabled = with_span(tracer)
+    print(f"disabled span: {(disabled - base) / N * 1e9:.0f}ns/span")
+    print(f"enabled span:  {(enabled - base) / N * 1e9:.0f}ns/span ({len(tracer.spans())} spans kept)")
+
+
+if __name__ == "__main__":
+    main()
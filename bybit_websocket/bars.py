@@ -0,0 +1,216 @@
+import heapq
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, NamedTuple, Set, Tuple
+
+from venues.events import Trade
+
+# Bar event kinds
+FINAL = "final"
+CORRECTION = "correction"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class BarEvent(NamedTuple):
+    kind: str  # FINAL or CORRECTION
+    symbol: str
+    timestamp: int  # open time (ms)
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    lag_ms: int  # emission time - close time of the bar
+
+
+class Bar:
+    """OHLCV of a bar. Open and close are decided by trade time, so the result does not depend on arrival order."""
+
+    __slots__ = ("timestamp", "open", "high", "low", "close", "volume", "first_ts", "last_ts")
+
+    def __init__(self, timestamp: int, trade_ts: int, price: float, size: float) -> None:
+        self.timestamp = timestamp
+        self.open = self.high = self.low = self.close = price
+        self.volume = size
+        self.first_ts = self.last_ts = trade_ts
+
+    def add(self, trade_ts: int, price: float, size: float) -> None:
+        if trade_ts < self.first_ts:
+            self.first_ts, self.open = trade_ts, price
+        if trade_ts >= self.last_ts:
+            self.last_ts, self.close = trade_ts, price
+        self.high = max(self.high, price)
+        self.low = min(self.low, price)
+        self.volume += size
+
+
+class BarBuilder:
+    """Build bars of a symbol incrementally with watermark based finalization.
+
+    The watermark is `the newest trade time - allowed_lateness_ms`. Trades newer than the watermark wait in a
+    small reorder buffer (heap) and are applied in order of trade time once the watermark passes them.
+    A bar is finalized and emitted exactly once when the watermark passes its close time.
+    A trade which arrives after its bar has been finalized updates the bar and emits a correction event
+    (or the first final event of the bar, if the bar had no trade when it was closed).
+    Trades are deduplicated by id, so frames redelivered across reconnects are not counted twice.
+
+    Args:
+        symbol (str): name of symbol.
+        interval_ms (int, optional): bar interval (ms). Defaults to 5000.
+        allowed_lateness_ms (int, optional): how long to wait for late trades before finalizing. Defaults to 1000.
+        max_finalized_bars (int, optional): the number of finalized bars kept for corrections. Defaults to 1000.
+        max_trade_ids (int, optional): the number of recent trade ids kept for deduplication. Defaults to 10000.
+        now_ms (Callable[[], int], optional): clock used to measure emission lag.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        interval_ms: int = 5000,
+        allowed_lateness_ms: int = 1000,
+        max_finalized_bars: int = 1000,
+        max_trade_ids: int = 10000,
+        now_ms: Callable[[], int] = _now_ms,
+    ) -> None:
+        self.symbol = symbol
+        self.interval_ms = interval_ms
+        self.allowed_lateness_ms = allowed_lateness_ms
+        self.max_finalized_bars = max_finalized_bars
+        self.now_ms = now_ms
+
+        self.watermark = -1
+        # (trade time, arrival sequence, price, size)
+        self._reorder_buffer: List[Tuple[int, int, float, float]] = []
+        self._sequence = 0
+        self._open_bars: Dict[int, Bar] = {}
+        self._finalized_bars: Dict[int, Bar] = {}
+        self._trade_ids: Set[str] = set()
+        self._trade_id_queue: Deque[str] = deque()
+        self._max_trade_ids = max_trade_ids
+
+        # Observability
+        self.last_lag_ms = 0
+        self.max_lag_ms = 0
+        self.dropped_trades = 0
+
+    def _bar_time(self, trade_ts: int) -> int:
+        return trade_ts - trade_ts % self.interval_ms
+
+    def _is_duplicate(self, trade_id: str) -> bool:
+        if trade_id in self._trade_ids:
+            return True
+        self._trade_ids.add(trade_id)
+        self._trade_id_queue.append(trade_id)
+        if len(self._trade_id_queue) > self._max_trade_ids:
+            self._trade_ids.discard(self._trade_id_queue.popleft())
+        return False
+
+    def _event(self, kind: str, bar: Bar) -> BarEvent:
+        lag_ms = self.now_ms() - (bar.timestamp + self.interval_ms)
+        if kind == FINAL:
+            self.last_lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        return BarEvent(kind, self.symbol, bar.timestamp, bar.open, bar.high, bar.low, bar.close, bar.volume, lag_ms)
+
+    def _apply(self, trade_ts: int, price: float, size: float) -> None:
+        bar_time = self._bar_time(trade_ts)
+        bar = self._open_bars.get(bar_time)
+        if bar is None:
+            self._open_bars[bar_time] = Bar(bar_time, trade_ts, price, size)
+        else:
+            bar.add(trade_ts, price, size)
+
+    def add_trade(self, trade_id: str, trade_ts: int, price: float, size: float) -> List[BarEvent]:
+        """Add a trade and return bar events (finalized bars in order of time, or a correction).
+
+        Args:
+            trade_id (str): trade id.
+            trade_ts (int): trade time (ms).
+            price (float): price.
+            size (float): size.
+
+        Returns:
+            List[BarEvent]: emitted bar events.
+        """
+        if self._is_duplicate(trade_id):
+            return []
+
+        bar_time = self._bar_time(trade_ts)
+        if bar_time + self.interval_ms <= self.watermark:
+            # The bar has already been finalized.
+            bar = self._finalized_bars.get(bar_time)
+            if bar is not None:
+                bar.add(trade_ts, price, size)
+                return [self._event(CORRECTION, bar)]
+
+            if len(self._finalized_bars) >= self.max_finalized_bars and bar_time < min(self._finalized_bars):
+                # Too old to correct.
+                self.dropped_trades += 1
+                return []
+
+            # No trade was in the bar when it was closed, so this is the first emission of the bar.
+            bar = Bar(bar_time, trade_ts, price, size)
+            self._finalized_bars[bar_time] = bar
+            self._trim_finalized_bars()
+            return [self._event(FINAL, bar)]
+
+        if trade_ts <= self.watermark:
+            # Late, but its bar is still open.
+            self._apply(trade_ts, price, size)
+            return []
+
+        heapq.heappush(self._reorder_buffer, (trade_ts, self._sequence, price, size))
+        self._sequence += 1
+        return self.advance(trade_ts - self.allowed_lateness_ms)
+
+    def add_trades(self, trades: List[Trade]) -> List[BarEvent]:
+        """Add normalized trades of the symbol."""
+        events = []
+        for trade in trades:
+            events.extend(self.add_trade(trade.id, trade.timestamp, trade.price, trade.size))
+        return events
+
+    def advance(self, watermark: int) -> List[BarEvent]:
+        """Move the watermark forward (it never moves back) and finalize bars closed before it.
+
+        This can also be called with a wall clock based watermark to finalize bars while no trade comes.
+
+        Args:
+            watermark (int): new watermark (ms).
+
+        Returns:
+            List[BarEvent]: finalized bars in order of time.
+        """
+        if watermark <= self.watermark:
+            return []
+        self.watermark = watermark
+
+        while self._reorder_buffer and self._reorder_buffer[0][0] <= watermark:
+            trade_ts, _, price, size = heapq.heappop(self._reorder_buffer)
+            self._apply(trade_ts, price, size)
+
+        events = []
+        for bar_time in sorted(self._open_bars.keys()):
+            if bar_time + self.interval_ms > watermark:
+                break
+            bar = self._open_bars.pop(bar_time)
+            self._finalized_bars[bar_time] = bar
+            events.append(self._event(FINAL, bar))
+
+        self._trim_finalized_bars()
+        return events
+
+    def advance_by_clock(self) -> List[BarEvent]:
+        """Advance the watermark to `now_ms() - allowed_lateness_ms`, so bars closed while no trade comes are finalized.
+
+        The clock is local while trade times come from the venue, so clock skew shifts when such bars are finalized.
+        A trade which arrives later still corrects its bar.
+        """
+        return self.advance(self.now_ms() - self.allowed_lateness_ms)
+
+    def _trim_finalized_bars(self) -> None:
+        while len(self._finalized_bars) > self.max_finalized_bars:
+            del self._finalized_bars[min(self._finalized_bars)]
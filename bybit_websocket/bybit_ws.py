@@ -5,9 +5,10 @@ from typing import Tuple, Union, List
 
 
 class BybitWebSocket:
-    def __init__(self, api_key: str, api_secret: str) -> None:
+    def __init__(self, api_key: str, api_secret: str, base_url: str = "wss://stream.bybit.com") -> None:
         self.api_key = api_key
         self.api_secret = api_secret
+        self.base_url = base_url
         self.is_db_refreshed = False
     
     def __signature(self) -> Tuple:
@@ -20,13 +21,13 @@ class BybitWebSocket:
         return signature, expires
 
     def _ws_public_url(self):
-        ws_url = "wss://stream.bybit.com/realtime_public"
+        ws_url = f"{self.base_url}/realtime_public"
         signature, expires = self.__signature()
         param = f"api_key={self.api_key}&expires={expires}&signature={signature}"
         return ws_url + "?" + param
 
     def _ws_private_url(self):
-        ws_url = "wss://stream.bybit.com/realtime_private"
+        ws_url = f"{self.base_url}/realtime_private"
         signature, expires = self.__signature()
         param = f"api_key={self.api_key}&expires={expires}&signature={signature}"
         return ws_url + "?" + param
@@ -0,0 +1,268 @@
+import mmap
+import struct
+import time
+import zlib
+from typing import BinaryIO, Iterator, List, NamedTuple
+
+import numpy as np
+
+from venues.events import BookDelta, Trade
+
+# Compact binary capture of ticks and board deltas.
+#
+# File layout:
+#   header: magic (8 bytes) | tick_size (f64) | size_step (f64) | symbol length (u16) | symbol (utf-8)
+#   blocks: n_events (u32) | compressed length (u32) | zlib compressed payload
+#
+# A block payload is columnar and independent of other blocks (delta encoding restarts at every block):
+#   kinds (u8 * n) | timestamps | prices | sizes | id lengths (u8 * n) | ids (utf-8)
+# timestamps (ms) and prices (integer tick counts) are stored as a base value and deltas, and sizes as integer
+# counts of `size_step`. Each of these integer columns is `width (u8) | base (i64) | values (width bytes * n)`,
+# where width is the smallest signed integer width which can hold every value of the block.
+
+MAGIC = b"BWCAP\x00\x01\x00"
+_HEADER = struct.Struct("<8sddH")
+_BLOCK_HEADER = struct.Struct("<II")
+_COLUMN_HEADER = struct.Struct("<Bq")
+
+# Event kinds. Board levels are keyed by price, so `INSERT` is not written (an update of a new price) and only
+# kept for files written by id-keyed board deltas.
+TRADE = 0
+SNAPSHOT = 1
+INSERT = 2
+UPDATE = 3
+DELETE = 4
+
+# The side is stored in the high bit of the kind byte.
+_SIDE_BIT = 0x80
+SIDES = ("Buy", "Sell")
+
+_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32, 8: np.int64}
+
+
+class CaptureEvent(NamedTuple):
+    kind: int
+    side: str
+    timestamp: int
+    price: float
+    size: float
+    id: str
+
+
+class CaptureBlock(NamedTuple):
+    kinds: np.ndarray
+    sides: np.ndarray  # 0: Buy, 1: Sell
+    timestamps: np.ndarray  # ms
+    price_ticks: np.ndarray
+    prices: np.ndarray
+    sizes: np.ndarray
+    ids: List[str]
+
+
+def _encode_column(values: np.ndarray, delta: bool) -> bytes:
+    if len(values) == 0:
+        return _COLUMN_HEADER.pack(1, 0)
+
+    base = int(values[0]) if delta else 0
+    if delta:
+        values = np.diff(values, prepend=values[0])
+    low, high = int(values.min()), int(values.max())
+    for width, dtype in _DTYPES.items():
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            break
+    return _COLUMN_HEADER.pack(width, base) + values.astype(dtype).tobytes()
+
+
+def _decode_column(payload: bytes, offset: int, n: int, delta: bool):
+    width, base = _COLUMN_HEADER.unpack_from(payload, offset)
+    offset += _COLUMN_HEADER.size
+    values = np.frombuffer(payload, dtype=_DTYPES[width], count=n, offset=offset).astype(np.int64)
+    if delta:
+        values = np.cumsum(values) + base
+    return values, offset + width * n
+
+
+class CaptureWriter:
+    """Streaming writer of the capture format.
+
+    Events are buffered and written as a compressed block every `block_size` events, or once the buffered events are
+    older than `flush_interval` seconds (and on `flush`/`close`). The interval bounds the events lost by a crash.
+
+    Args:
+        path (str): path of the capture file.
+        symbol (str): name of symbol.
+        tick_size (float): price tick size of the symbol. Prices are stored as integer counts of it.
+        size_step (float): size step of the symbol. Sizes are stored as integer counts of it.
+        block_size (int, optional): the number of events in a block. Defaults to 4096.
+        compress_level (int, optional): zlib compression level. Defaults to 6.
+        flush_interval (float, optional): max age (seconds) of buffered events. Defaults to 5.0.
+    """
+
+    def __init__(
+        self, path: str, symbol: str, tick_size: float, size_step: float, block_size: int = 4096, compress_level: int = 6, flush_interval: float = 5.0
+    ) -> None:
+        self.symbol = symbol
+        self.tick_size = tick_size
+        self.size_step = size_step
+        self.block_size = block_size
+        self.compress_level = compress_level
+        self.flush_interval = flush_interval
+        self._file: BinaryIO = open(path, "wb")
+        encoded_symbol = symbol.encode()
+        self._file.write(_HEADER.pack(MAGIC, tick_size, size_step, len(encoded_symbol)) + encoded_symbol)
+        self._file.flush()
+        self._clear_buffer()
+
+    def _clear_buffer(self) -> None:
+        # monotonic time of the first buffered event
+        self._buffered_at = 0.0
+        self._kinds: List[int] = []
+        self._timestamps: List[int] = []
+        self._prices: List[int] = []
+        self._sizes: List[int] = []
+        self._ids: List[bytes] = []
+
+    def _to_count(self, value: float, step: float, name: str) -> int:
+        count = round(value / step)
+        if abs(count * step - value) > step * 1e-6:
+            raise ValueError(f"{name} {value} is not a multiple of {step}.")
+        return count
+
+    def _append(self, kind: int, side: str, timestamp: int, price: float, size: float, id: str) -> None:
+        # Validate before appending, so a rejected event leaves every column at the same length.
+        price_count = self._to_count(price, self.tick_size, "price")
+        size_count = self._to_count(size, self.size_step, "size")
+        encoded_id = id.encode()
+        if len(encoded_id) > 255:
+            raise ValueError(f"id {id} is too long.")
+
+        if len(self._kinds) == 0:
+            self._buffered_at = time.monotonic()
+        self._kinds.append(kind | _SIDE_BIT if side == "Sell" else kind)
+        self._timestamps.append(timestamp)
+        self._prices.append(price_count)
+        self._sizes.append(size_count)
+        self._ids.append(encoded_id)
+
+        if len(self._kinds) >= self.block_size or time.monotonic() - self._buffered_at >= self.flush_interval:
+            self.flush()
+
+    def write_trades(self, trades: List[Trade]) -> None:
+        """Write normalized trades."""
+        for trade in trades:
+            self._append(TRADE, trade.side, trade.timestamp, trade.price, trade.size, trade.id)
+
+    def write_book_delta(self, delta: BookDelta) -> None:
+        """Write a normalized board delta. Levels of size 0 are written as `DELETE`."""
+        kind = SNAPSHOT if delta.is_snapshot else UPDATE
+        for side, levels in (("Buy", delta.bids), ("Sell", delta.asks)):
+            for price, size in levels:
+                self._append(kind if size != 0 else DELETE, side, delta.timestamp, price, size, "")
+
+    def flush(self) -> None:
+        """Write buffered events as a block."""
+        n = len(self._kinds)
+        if n == 0:
+            return
+
+        payload = b"".join([
+            np.array(self._kinds, dtype=np.uint8).tobytes(),
+            _encode_column(np.array(self._timestamps, dtype=np.int64), delta=True),
+            _encode_column(np.array(self._prices, dtype=np.int64), delta=True),
+            _encode_column(np.array(self._sizes, dtype=np.int64), delta=False),
+            bytes(len(id) for id in self._ids),
+            b"".join(self._ids),
+        ])
+        compressed = zlib.compress(payload, self.compress_level)
+        self._file.write(_BLOCK_HEADER.pack(n, len(compressed)) + compressed)
+        self._file.flush()
+        self._clear_buffer()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class CaptureReader:
+    """Memory mapped reader of the capture format.
+
+    Args:
+        path (str): path of the capture file.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.tick_size, self.size_step, symbol_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a capture file.")
+        self.symbol = bytes(self._mmap[_HEADER.size:_HEADER.size + symbol_length]).decode()
+
+        # (offset of compressed payload, compressed length, the number of events) of each block
+        self._blocks = []
+        offset = _HEADER.size + symbol_length
+        while offset + _BLOCK_HEADER.size <= len(self._mmap):
+            n, length = _BLOCK_HEADER.unpack_from(self._mmap, offset)
+            offset += _BLOCK_HEADER.size
+            if offset + length > len(self._mmap):
+                # The last block is being written (or truncated by a crash).
+                break
+            self._blocks.append((offset, length, n))
+            offset += length
+
+    def __len__(self) -> int:
+        return sum(n for _, _, n in self._blocks)
+
+    def _decode_block(self, offset: int, length: int, n: int) -> CaptureBlock:
+        payload = zlib.decompress(self._mmap[offset:offset + length])
+        kinds = np.frombuffer(payload, dtype=np.uint8, count=n)
+        timestamps, column_offset = _decode_column(payload, n, n, delta=True)
+        price_ticks, column_offset = _decode_column(payload, column_offset, n, delta=True)
+        size_counts, column_offset = _decode_column(payload, column_offset, n, delta=False)
+
+        id_lengths = payload[column_offset:column_offset + n]
+        id_offset = column_offset + n
+        ids = []
+        for id_length in id_lengths:
+            ids.append(payload[id_offset:id_offset + id_length].decode())
+            id_offset += id_length
+
+        return CaptureBlock(
+            kinds=kinds & (0xFF ^ _SIDE_BIT),
+            sides=(kinds & _SIDE_BIT) >> 7,
+            timestamps=timestamps,
+            price_ticks=price_ticks,
+            prices=price_ticks * self.tick_size,
+            sizes=size_counts * self.size_step,
+            ids=ids,
+        )
+
+    def iter_blocks(self) -> Iterator[CaptureBlock]:
+        """Yield decoded blocks as NumPy arrays."""
+        for offset, length, n in self._blocks:
+            yield self._decode_block(offset, length, n)
+
+    def __iter__(self) -> Iterator[CaptureEvent]:
+        """Yield events one by one."""
+        for block in self.iter_blocks():
+            rows = zip(block.kinds.tolist(), block.sides.tolist(), block.timestamps.tolist(), block.prices.tolist(), block.sizes.tolist(), block.ids)
+            for kind, side, timestamp, price, size, id in rows:
+                yield CaptureEvent(kind, SIDES[side], timestamp, price, size, id)
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "CaptureReader":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
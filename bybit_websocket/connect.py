@@ -1,17 +1,27 @@
-from typing import List
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
 import websockets
 import asyncio
 import os
-import json
 import logging
+import signal
 import time
 from dotenv import load_dotenv
-import matplotlib.pyplot as plt
 
+from bars import FINAL, BarBuilder, BarEvent
 from bybit_ws import BybitWebSocket
-from db import crud, models
-from db.database import SessionLocal, engine
-from utils.cusmom_exceptions import ConnectionFailedError
+from market_state import MarketState
+from read_service import ReadService
+from utils.cusmom_exceptions import ConnectionFailedError, UnexpectedMessageError
+from utils.loop_lag import LoopLagMonitor
+from utils.sampling_profiler import SamplingProfiler
+from utils.tracing import tracer
+from venues.base import VenueAdapter
+from venues.bybit import BybitAdapter
+from venues.bybit_v5 import BybitV5Adapter
+from venues.events import BookDelta, Trade
+
+if TYPE_CHECKING:
+    from capture import CaptureWriter
 
 # Load .env file
 load_dotenv()
@@ -25,58 +35,168 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-bybit_ws = BybitWebSocket(api_key=os.environ["BYBIT_API_KEY"], api_secret=os.environ["BYBIT_SECRET_KEY"])
-
-
-async def orderbook_ws(ws_url :str, symbol: str):
-    async with websockets.connect(ws_url, logger=logger, ping_timeout=1.0) as ws:
+bybit_ws = BybitWebSocket(
+    api_key=os.environ["BYBIT_API_KEY"],
+    api_secret=os.environ["BYBIT_SECRET_KEY"],
+    base_url=os.environ.get("BYBIT_WS_BASE_URL", "wss://stream.bybit.com"),
+)
+# Set `VENUE` to choose the adapter of public streams.
+venue_adapters: Dict[str, Callable[[], VenueAdapter]] = {
+    BybitAdapter.name: lambda: BybitAdapter(bybit_ws),
+    BybitV5Adapter.name: lambda: BybitV5Adapter(base_url=bybit_ws.base_url),
+}
+adapter = venue_adapters[os.environ.get("VENUE", BybitAdapter.name)]()
+market_state = MarketState()
+
+# 5 seconds bars are finalized once trades are `BAR_ALLOWED_LATENESS_MS` newer than their close time.
+BAR_INTERVAL_MS = 5000
+BAR_ALLOWED_LATENESS_MS = 1000
+# Kept across reconnects, so late trades after a reconnect still correct their bars.
+bar_builders: Dict[str, BarBuilder] = {}
+# Bars are also finalized by the wall clock every `BAR_CLOCK_INTERVAL` seconds, so the last closed bar is emitted
+# while no trade comes.
+BAR_CLOCK_INTERVAL = 1.0
+
+# Set `CAPTURE_DIR` to capture ticks and board deltas (see `capture.py`).
+# Prices and sizes are stored as integer counts of these steps, which divide the steps of USDT perpetuals.
+CAPTURE_TICK_SIZE = 0.01
+CAPTURE_SIZE_STEP = 0.001
+capture_writers: Dict[str, "CaptureWriter"] = {}
+# Symbols whose capture failed. They are not captured again until restart.
+disabled_capture_symbols: Set[str] = set()
+
+
+def parse_capture_steps(value: str) -> Dict[str, Tuple[float, float]]:
+    """Parse per symbol (tick size, size step), e.g. "BTCUSDT=0.5:0.001,ETHUSDT=0.05:0.01"."""
+    capture_steps = {}
+    for item in value.split(","):
+        if item.strip() == "":
+            continue
+        symbol, steps = item.split("=")
+        tick_size, size_step = steps.split(":")
+        capture_steps[symbol.strip()] = (float(tick_size), float(size_step))
+    return capture_steps
+
+
+# Set `CAPTURE_STEPS` to override the steps per symbol.
+capture_steps = parse_capture_steps(os.environ.get("CAPTURE_STEPS", ""))
+
+
+def get_capture_writer(symbol: str) -> Optional["CaptureWriter"]:
+    capture_dir = os.environ.get("CAPTURE_DIR")
+    if capture_dir is None:
+        return None
+
+    if symbol in disabled_capture_symbols:
+        return None
+
+    if symbol not in capture_writers:
+        # Imported here to keep numpy out of the startup path when capture is disabled.
+        from capture import CaptureWriter
+        path = os.path.join(capture_dir, f"{symbol}-{int(time.time())}.bwcap")
+        tick_size, size_step = capture_steps.get(symbol, (CAPTURE_TICK_SIZE, CAPTURE_SIZE_STEP))
+        capture_writers[symbol] = CaptureWriter(path, symbol=symbol, tick_size=tick_size, size_step=size_step)
+        logger.info(f"Capture {symbol} to {path}")
+    return capture_writers[symbol]
+
+
+def disable_capture_writer(symbol: str, error: Exception) -> None:
+    """Stop capturing `symbol` after a capture error, keeping the events written so far.
+
+    Capture is a side output, so its errors (e.g. a price which is not a multiple of the tick size) must not stop the collector.
+    """
+    logger.error(f"Disable capture of {symbol}: {error}")
+    disabled_capture_symbols.add(symbol)
+    capture_writer = capture_writers.pop(symbol, None)
+    if capture_writer is not None:
+        try:
+            capture_writer.close()
+        except OSError as e:
+            logger.error(f"Failed to close capture of {symbol}: {e}")
+
+
+def get_bar_builder(symbol: str) -> BarBuilder:
+    if symbol not in bar_builders:
+        bar_builders[symbol] = BarBuilder(symbol, interval_ms=BAR_INTERVAL_MS, allowed_lateness_ms=BAR_ALLOWED_LATENESS_MS)
+    return bar_builders[symbol]
+
+
+def publish_bar_stats(bar_builder: BarBuilder) -> None:
+    market_state.set_bar_stats(bar_builder.symbol, bar_builder.last_lag_ms, bar_builder.max_lag_ms, bar_builder.dropped_trades)
+
+
+async def store_bar_events(db, bar_events: List[BarEvent]) -> None:
+    """Insert finalized bars and update corrected bars of ohlcv table."""
+    from db import async_crud, schemas
+
+    insert_items, update_items = [], []
+    for event in bar_events:
+        item = schemas.OHLCVCreate(
+            timestamp=event.timestamp, symbol=event.symbol, open=event.open, high=event.high, low=event.low, close=event.close, volume=event.volume
+        )
+        if event.kind == FINAL:
+            insert_items.append(item)
+        else:
+            update_items.append(item)
+        logger.info(f"Bar {event.kind}: {event.symbol} {event.timestamp} (lag {event.lag_ms}ms)")
+
+    if len(insert_items) > 0:
+        await async_crud.insert_ohlcv_items(db=db, insert_items=insert_items, max_rows=1000)
+    if len(update_items) > 0:
+        await async_crud.update_ohlcv_items(db=db, update_items=update_items)
+
+
+async def orderbook_ws(adapter: VenueAdapter, symbol: str):
+    async with websockets.connect(adapter.public_url(), logger=logger, ping_timeout=1.0) as ws:
         # Subscribe board topic
-        board_topic = bybit_ws._orderbookL2_25(symbol)
-        subscribe_message = bybit_ws.subscribe_topic(board_topic)
+        board_topic = adapter.book_topic(symbol)
+        subscribe_message = adapter.subscribe_message([board_topic])
         await asyncio.wait_for(ws.send(subscribe_message), timeout=1.0)
 
+        # Import the DB layer after subscribing, so the subscription is not delayed by the sqlalchemy import.
+        # Frames are buffered by websockets in the meantime.
+        from db import async_crud
+        from db.async_database import AsyncSessionLocal, init_db
+        from sqlalchemy.exc import SQLAlchemyError
+        await init_db()
+        capture_writer = get_capture_writer(symbol)
+
         while True:
             try:
                 # Get data
-                res = await ws.recv()
-                res = json.loads(res)
-                if "type" in list(res.keys()):
-                    with SessionLocal() as db:
-                        # ws.logger.info(res)
-
-                        if res["type"] == "snapshot":
-                            crud.insert_board_items(db=db, insert_items=res["data"]["order_book"])
-                        elif res["type"] == "delta":
-                            delete_items: List = res["data"]["delete"]
-                            if len(delete_items) > 0:
-                                crud.delete_board_items(db=db, delete_items=delete_items)
-                            
-                            update_items: List = res["data"]["update"]
-                            if len(update_items) > 0:
-                                crud.update_board_items(db=db, update_items=update_items)
-                            
-                            insert_items: List = res["data"]["insert"]
-                            if len(insert_items) > 0:
-                                crud.insert_board_items(db=db, insert_items=insert_items)
-                        else:
-                            ws.logger.info("Something wrong with responce.")
-                            await asyncio.sleep(0.0)
-                            raise ConnectionFailedError
-
-                    bybit_ws.is_db_refreshed = True
-                    await asyncio.sleep(0.0)
-
-                elif "success" in list(res.keys()):
+                with tracer.span("recv"):
+                    res = await ws.recv()
+                with tracer.span("decode"):
+                    book_deltas: List[BookDelta] = adapter.parse(res)
+                if len(book_deltas) == 0:
                     # Subscribe responce is randomly comming from bybit
-                    ws.logger.info("success subscribe!!")
                     await asyncio.sleep(0.0)
                     continue
-                else:
-                    ws.logger.error("responce dont have any key of [`success`, `type`]")
-                    print(res)
-                    await asyncio.sleep(5)
-                    raise ConnectionFailedError
-            
+
+                for book_delta in book_deltas:
+                    if capture_writer is not None:
+                        with tracer.span("capture"):
+                            try:
+                                capture_writer.write_book_delta(book_delta)
+                            except (ValueError, OSError) as e:
+                                disable_capture_writer(symbol, e)
+                                capture_writer = None
+                    with tracer.span("book apply"):
+                        market_state.apply_book_delta(book_delta)
+                        try:
+                            async with AsyncSessionLocal() as db:
+                                await async_crud.apply_book_delta(db=db, delta=book_delta)
+                        except SQLAlchemyError as e:
+                            logger.error(f"Failed to store board of {symbol}: {e}")
+
+                bybit_ws.is_db_refreshed = True
+                await asyncio.sleep(0.0)
+
+            except UnexpectedMessageError as e:
+                ws.logger.error(e)
+                await asyncio.sleep(0.0)
+                raise ConnectionFailedError
+
             except websockets.exceptions.ConnectionClosed:
                 ws.logger.error("Public websocket connection has been closed.")
                 await asyncio.sleep(0.0)
@@ -88,47 +208,74 @@ async def orderbook_ws(ws_url :str, symbol: str):
                 raise ConnectionFailedError
 
 
-async def ticks_ws(ws_url :str, symbol: str):
-    async with websockets.connect(ws_url, logger=logger, ping_timeout=1.0) as ws:
-        # Subscribe board topic
-        ticks_topic = bybit_ws._ticks(symbol)
-        subscribe_message = bybit_ws.subscribe_topic(ticks_topic)
+async def ticks_ws(adapter: VenueAdapter, symbol: str):
+    async with websockets.connect(adapter.public_url(), logger=logger, ping_timeout=1.0) as ws:
+        # Subscribe trade topic
+        ticks_topic = adapter.trades_topic(symbol)
+        subscribe_message = adapter.subscribe_message([ticks_topic])
         await asyncio.wait_for(ws.send(subscribe_message), timeout=1.0)
 
+        # Import the DB layer after subscribing, so the subscription is not delayed by the sqlalchemy import.
+        # Frames are buffered by websockets in the meantime.
+        from db import async_crud
+        from db.async_database import AsyncSessionLocal, init_db
+        from sqlalchemy.exc import SQLAlchemyError
+        await init_db()
+        capture_writer = get_capture_writer(symbol)
+        bar_builder = get_bar_builder(symbol)
+
         while True:
             try:
                 # Get data
-                res = await ws.recv()
-                res = json.loads(res)
-                if "data" in list(res.keys()):
-                    ticks_data = res["data"]
-                    if len(ticks_data) > 0:
-                        with SessionLocal() as db:
-                            # Check
-                            print("Number of ticks:", crud._count_ticks(db=db))
-                            print("Number of ohlcv:", crud._count_ohlcv(db=db))
-                            print(len(crud.get_ohlcv(db=db)))
-
-                            # Insert tick data
-                            crud.insert_tick_items(db=db, insert_items=ticks_data, max_rows=1000)
-
-                            # Create and storeohlcv data
-                            crud.create_ohlcv_from_ticks(db, symbol=symbol, max_rows=1000)
-                        
-                    bybit_ws.is_db_refreshed = True
-                    await asyncio.sleep(0.0)
-
-                elif "success" in list(res.keys()):
+                with tracer.span("recv"):
+                    res = await ws.recv()
+                with tracer.span("decode"):
+                    trades: List[Trade] = adapter.parse(res)
+                if len(trades) == 0:
                     # Subscribe responce
-                    ws.logger.info(res)
                     await asyncio.sleep(0.0)
                     continue
-                else:
-                    ws.logger.error("responce dont have any key of [`success`, `data`]")
-                    ws.logger.error(res)
-                    await asyncio.sleep(0.0)
-                    raise ConnectionFailedError
-            
+
+                if capture_writer is not None:
+                    with tracer.span("capture"):
+                        try:
+                            capture_writer.write_trades(trades)
+                        except (ValueError, OSError) as e:
+                            disable_capture_writer(symbol, e)
+                            capture_writer = None
+                with tracer.span("candle update"):
+                    market_state.add_trades(trades)
+                    bar_events = bar_builder.add_trades(trades)
+                    if len(bar_events) > 0:
+                        publish_bar_stats(bar_builder)
+                try:
+                    async with AsyncSessionLocal() as db:
+                        # Check (COUNT queries on every message, so only at debug level)
+                        if logger.isEnabledFor(logging.DEBUG):
+                            with tracer.span("debug counts"):
+                                logger.debug(f"Number of ticks: {await async_crud._count_ticks(db=db)}")
+                                logger.debug(f"Number of ohlcv: {await async_crud._count_ohlcv(db=db)}")
+
+                        # Insert tick data (committed in `insert_tick_items`)
+                        with tracer.span("tick insert"):
+                            await async_crud.insert_tick_items(db=db, insert_items=trades, max_rows=1000)
+
+                        # Store closed bars and corrections by late ticks
+                        if len(bar_events) > 0:
+                            with tracer.span("candle store"):
+                                await store_bar_events(db, bar_events)
+                except SQLAlchemyError as e:
+                    # The in-memory state is already updated, so keep ingesting and drop this write.
+                    logger.error(f"Failed to store trades of {symbol}: {e}")
+
+                bybit_ws.is_db_refreshed = True
+                await asyncio.sleep(0.0)
+
+            except UnexpectedMessageError as e:
+                ws.logger.error(e)
+                await asyncio.sleep(0.0)
+                raise ConnectionFailedError
+
             except websockets.exceptions.ConnectionClosed:
                 ws.logger.error("Public websocket connection has been closed.")
                 await asyncio.sleep(0.0)
@@ -140,17 +287,42 @@ async def ticks_ws(ws_url :str, symbol: str):
                 raise ConnectionFailedError
 
 
+async def finalize_bars_by_clock(interval: float = BAR_CLOCK_INTERVAL) -> None:
+    """Run forever. Finalize bars of every symbol by the wall clock and store them."""
+    while True:
+        await asyncio.sleep(interval)
+        for bar_builder in list(bar_builders.values()):
+            bar_events = bar_builder.advance_by_clock()
+            if len(bar_events) == 0:
+                continue
+            publish_bar_stats(bar_builder)
+
+            # Bar builders are created by `ticks_ws` after the DB is initialized, so the DB layer is imported here.
+            from db.async_database import AsyncSessionLocal
+            from sqlalchemy.exc import SQLAlchemyError
+            try:
+                async with AsyncSessionLocal() as db:
+                    with tracer.span("candle store"):
+                        await store_bar_events(db, bar_events)
+            except SQLAlchemyError as e:
+                logger.error(f"Failed to store bars of {bar_builder.symbol}: {e}")
+
+
 async def trading_ws(ws_url: str):
     async with websockets.connect(ws_url, logger=logger, ping_timeout=1.0) as ws:
+        from db import async_crud
+        from db.async_database import AsyncSessionLocal, init_db
+        await init_db()
+
         while True:
             try:
                 if bybit_ws.is_db_refreshed:
                     bybit_ws.is_db_refreshed = False
 
                     start = time.time()
-                    with SessionLocal() as db:
-                        buy_borad = crud.get_board(db=db, symbol="BTCUSDT", side="Buy")
-                        sell_board = crud.get_board(db, symbol="BTCUSDT", side="Sell")
+                    async with AsyncSessionLocal() as db:
+                        buy_borad = await async_crud.get_board(db=db, symbol="BTCUSDT", side="Buy")
+                        sell_board = await async_crud.get_board(db, symbol="BTCUSDT", side="Sell")
                         best_bid, best_ask = buy_borad[-1], sell_board[0]
                         
                         ws.logger.info(f"Best Ask (price, size): ({best_ask.price}, {best_ask.size})")
@@ -169,31 +341,94 @@ async def trading_ws(ws_url: str):
 async def run_multiple_websockets():
     symbol = "BTCUSDT"
     await asyncio.gather(
-        ticks_ws(ws_url=bybit_ws._ws_public_url(), symbol=symbol),
+        ticks_ws(adapter=adapter, symbol=symbol),
     )
 
 
+def setup_profiling() -> Optional[SamplingProfiler]:
+    """Enable tracing and sampling profiler by environment variables.
+
+    - TRACE_OUTPUT: path of Chrome trace JSON. Spans of each message stage are kept in a ring buffer
+      (TRACE_CAPACITY spans) and dumped on exit (including SIGINT and SIGTERM) or on SIGUSR1.
+    - PROFILE_SECONDS: run a sampling profiler for the first PROFILE_SECONDS seconds and write
+      collapsed stacks to PROFILE_OUTPUT (default: profile.folded). They are also written on exit (including SIGINT and SIGTERM).
+
+    Returns:
+        Optional[SamplingProfiler]: the started profiler, or None if it is disabled.
+    """
+    trace_output = os.environ.get("TRACE_OUTPUT")
+    if trace_output is not None:
+        tracer.enable(capacity=int(os.environ.get("TRACE_CAPACITY", 100000)))
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, tracer.dump_chrome_trace, trace_output)
+        except (AttributeError, NotImplementedError):
+            # No SIGUSR1 (e.g. Windows). The trace is dumped on exit only.
+            pass
+        logger.info(f"Tracing is enabled. Chrome trace is dumped to {trace_output}")
+
+    profile_seconds = os.environ.get("PROFILE_SECONDS")
+    if profile_seconds is None:
+        return None
+    profile_output = os.environ.get("PROFILE_OUTPUT", "profile.folded")
+    sampling_profiler = SamplingProfiler(duration=float(profile_seconds), output_path=profile_output)
+    sampling_profiler.start()
+    logger.info(f"Sampling profiler runs for {profile_seconds}s. Collapsed stacks are written to {profile_output}")
+    return sampling_profiler
+
+
+async def run_collector():
+    # docker and systemd stop the collector with SIGTERM. Cancel this task, so the `finally` below flushes capture
+    # files and dumps the trace and profile as on Ctrl-C.
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        # No signal handlers on the event loop (e.g. Windows).
+        pass
+    sampling_profiler = setup_profiling()
+    loop_lag_monitor = LoopLagMonitor(interval=0.1)
+    monitor_task = asyncio.create_task(loop_lag_monitor.run(logger=logger))
+    bar_clock_task = asyncio.create_task(finalize_bars_by_clock())
+    read_service = ReadService(market_state, port=int(os.environ.get("READ_SERVICE_PORT", 8080)))
+    try:
+        read_server = await read_service.start()
+    except OSError as e:
+        # The read service is optional. Keep collecting even if its port is not available.
+        logger.error(f"Failed to start read service: {e}")
+        read_server = None
+    try:
+        while True:
+            try:
+                await run_multiple_websockets()
+            except ConnectionFailedError:
+                bybit_ws.is_db_refreshed = False
+                market_state.clear_boards()
+                # Clear stale rows. The schema is created only once, so reconnect does not run any DDL.
+                # ohlcv rows are kept because bar builders keep their state across reconnects.
+                from db.async_database import clear_db
+                await clear_db(table_names=["board", "tick"])
+
+                logger.info("Reconnect websockets")
+    finally:
+        monitor_task.cancel()
+        bar_clock_task.cancel()
+        if read_server is not None:
+            read_server.close()
+        for capture_writer in capture_writers.values():
+            capture_writer.close()
+        if tracer.enabled:
+            tracer.dump_chrome_trace(os.environ["TRACE_OUTPUT"])
+        if sampling_profiler is not None:
+            sampling_profiler.stop()
+        from db.async_database import async_engine
+        await async_engine.dispose()
+
+
 def main():
     try:
-        # Initialize sqlite3 in-memory database
-        models.Base.metadata.create_all(engine)
-        asyncio.run(run_multiple_websockets())
-    except ConnectionFailedError:
-        bybit_ws.is_db_refreshed = False
-        # Clear in-memory DB
-        models.Base.metadata.drop_all(engine)
-
-        # Initialize sqlite3 in-memory DB
-        models.Base.metadata.create_all(engine)
-        
-        logger.info("Reconnect websockets")
-        asyncio.run(main())
-
-    # Clear in-memory DB again for next try
-    models.Base.metadata.drop_all(engine)
-    bybit_ws.is_db_refreshed = False
+        asyncio.run(run_collector())
+    except asyncio.CancelledError:
+        logger.info("Collector stopped by SIGTERM")
+
 
 if __name__ == "__main__":
-    while True:
-        main()
-    
\ No newline at end of file
+    main()
@@ -0,0 +1,180 @@
+from typing import Dict, List, Optional, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, schemas
+from venues.events import BookDelta, Trade
+
+# Async mirror of `crud`. Every method runs the sync implementation in `crud`
+# through `AsyncSession.run_sync`, so the query logic lives in one place and the
+# database I/O is done by aiosqlite without blocking the event loop.
+
+
+# Board methods
+async def get_whole_board(db: AsyncSession) -> List[schemas.Board]:
+    """[Get all board]
+
+    Args:
+        db (AsyncSession): [AsyncSession of sqlalchemy.]
+    """
+    return await db.run_sync(crud.get_whole_board)
+
+
+async def get_board(db: AsyncSession, symbol: str, side: str) -> List[schemas.Board]:
+    """[Get current board. return with ascending order of price.]
+
+    Args:
+        db (AsyncSession): [AsyncSession of sqlalchemy.]
+        symbol (str): [target symbol.]
+        side (str): [target side (Buy or Sell)]
+
+    Raises:
+        ValueError: [raise error if `side` is invalid]
+    """
+    return await db.run_sync(crud.get_board, symbol=symbol, side=side)
+
+
+async def apply_book_delta(db: AsyncSession, delta: BookDelta) -> None:
+    """[Apply a normalized board delta (or snapshot). Levels of size 0 are deleted.]
+
+    Args:
+        db (AsyncSession): [AsyncSession of sqlalchemy]
+        delta (BookDelta): [board delta translated by a venue adapter]
+    """
+    await db.run_sync(crud.apply_book_delta, delta=delta)
+
+
+async def get_board_item(db: AsyncSession, id: str) -> schemas.Board:
+    """get board item (row) by id
+
+    Args:
+        db (AsyncSession): [AsyncSession of sqlalchemy.]
+        id (str): [id]
+    """
+    return await db.run_sync(crud.get_board_item, id=id)
+
+
+# Tick methods
+async def get_all_ticks(db: AsyncSession, symbol: str) -> List[schemas.Tick]:
+    """get all tick data
+
+    Args:
+        db (AsyncSession): AsyncSession of sqlalchemy
+        symbol (str): Name of symbol
+    """
+    return await db.run_sync(crud.get_all_ticks, symbol=symbol)
+
+
+async def _count_ticks(db: AsyncSession) -> int:
+    """Get count of rows in `tick` table
+
+    Args:
+        db (AsyncSession): AsyncSession of sqlalchemy
+    """
+    return await db.run_sync(crud._count_ticks)
+
+
+async def get_ticks(db: AsyncSession, is_newer: bool, limit: int = 1) -> List[schemas.Tick]:
+    """Get older or newer tick data.
+
+    Args:
+        db (AsyncSession): AsyncSession of sqlalchemy
+        is_newer (bool): If True, get newer data.
+        limit (int, optional): the number of ticks to get. Defaults to 1 (oldest ticks).
+    """
+    return await db.run_sync(crud.get_ticks, is_newer=is_newer, limit=limit)
+
+
+async def delete_tick_items(db: AsyncSession, delete_items: List[schemas.Tick]) -> None:
+    """Delete tick items
+
+    Args:
+        db (AsyncSession): AsyncSession of sqlalchemy
+        delete_items (List[schemas.Tick]): the list of delete items
+    """
+    await db.run_sync(crud.delete_tick_items, delete_items=delete_items)
+
+
+async def insert_tick_items(db: AsyncSession, insert_items: List[Trade], max_rows: int = 100) -> None:
+    """Insert normalized trades and delete older rows over `max_rows`.
+
+    Args:
+        db (AsyncSession): AsyncSession of sqlalchemy
+        insert_items (List[Trade]): trades translated by a venue adapter.
+        max_rows (int, optional): max rows of tick table. Defaults to 100.
+    """
+    await db.run_sync(crud.insert_tick_items, insert_items=insert_items, max_rows=max_rows)
+
+
+# OHLCV methods
+async def _count_ohlcv(db: AsyncSession) -> int:
+    """Count ohlcv rows
+
+    Args:
+        db (AsyncSession): AsyncSession of sqlalchemy
+    """
+    return await db.run_sync(crud._count_ohlcv)
+
+
+async def get_ohlcv_with_symbol(db: AsyncSession, symbol: Optional[str] = None, limit: Optional[int] = None, ascending: bool = True) -> List[schemas.OHLCV]:
+    """get all ohlcv of a symbol
+
+    Args:
+        db (AsyncSession): AsyncSession of sqlalchemy
+        symbol (str): Name of symbol
+        limit (Optional[int], optional): limit. Defaults to None.
+        ascending (bool, optional): ascending order. Defaults to True.
+    """
+    return await db.run_sync(crud.get_ohlcv_with_symbol, symbol=symbol, limit=limit, ascending=ascending)
+
+
+async def get_ohlcv(db: AsyncSession, limit: Optional[int] = None, ascending: bool = True) -> List[schemas.OHLCV]:
+    """get all ohlcv
+
+    Args:
+        db (AsyncSession): AsyncSession of sqlalchemy
+        limit (Optional[int], optional): limit. Defaults to None.
+        ascending (bool, optional): ascending order. Defaults to True.
+    """
+    return await db.run_sync(crud.get_ohlcv, limit=limit, ascending=ascending)
+
+
+async def insert_ohlcv_items(db: AsyncSession, insert_items: List[schemas.OHLCVCreate], max_rows: int = 100) -> None:
+    """Insert ohlcv items
+
+    Args:
+        db (AsyncSession): AsyncSession of sqlalchemy
+        insert_items (List[schemas.OHLCVCreate]): List of ohlcv items.
+        max_rows (int, optional): max rows of ohlcv table. Defaults to 100.
+    """
+    await db.run_sync(crud.insert_ohlcv_items, insert_items=insert_items, max_rows=max_rows)
+
+
+async def update_ohlcv_items(db: AsyncSession, update_items: List[schemas.OHLCV]) -> None:
+    """Update ohlcv items
+
+    Args:
+        db (AsyncSession): AsyncSession of sqlalchemy
+        update_items (List[schemas.OHLCV]): update ohlcv items.
+    """
+    await db.run_sync(crud.update_ohlcv_items, update_items=update_items)
+
+
+async def delete_ohlcv_items(db: AsyncSession, delete_items: List[Union[Dict, schemas.OHLCV]]) -> None:
+    """Delete ohlcv items
+
+    Args:
+        db (AsyncSession): AsyncSession of sqlalchemy
+        delete_items (List[Union[Dict, schemas.OHLCV]]): delete ohlcv items.
+    """
+    await db.run_sync(crud.delete_ohlcv_items, delete_items=delete_items)
+
+
+async def create_ohlcv_from_ticks(db: AsyncSession, symbol: str, max_rows: int = 100) -> None:
+    """Create OHLCV (5 seconds) from tick data.
+
+    Args:
+        db (AsyncSession): AsyncSession of sqlalchemy
+        symbol (str): Name of pair
+        max_rows (int, optional): max rows of ohlcv table. Defaults to 100.
+    """
+    await db.run_sync(crud.create_ohlcv_from_ticks, symbol=symbol, max_rows=max_rows)
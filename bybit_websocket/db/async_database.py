@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from typing import List, Optional
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# Single long-lived engine shared by every coroutine of the collector.
+# The pool is bounded (no overflow) so a burst of messages queues on the pool
+# instead of opening an unbounded number of sqlite connections.
+async_engine = create_async_engine(
+    "sqlite+aiosqlite:///example.db",
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=5,
+    max_overflow=0,
+    pool_timeout=10,
+)
+
+# expire_on_commit=False because attributes of expired ORM objects can not be lazy loaded outside of the greenlet.
+AsyncSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession, autocommit=False, autoflush=False, expire_on_commit=False)
+
+
+_init_task: Optional["asyncio.Task[None]"] = None
+
+
+def _drop_outdated_tables(conn: Connection) -> None:
+    """Drop existing tables whose primary key or columns differ from the models.
+
+    `create_all` never alters an existing table, so a table created by an older schema (e.g. ohlcv keyed only by
+    timestamp) would be reused as it is. The tables hold market data collected again after a restart, so they are
+    recreated instead of migrated.
+    """
+    inspector = inspect(conn)
+    for table in models.Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        primary_key = set(inspector.get_pk_constraint(table.name)["constrained_columns"])
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        if primary_key != {column.name for column in table.primary_key} or columns != {column.name for column in table.columns}:
+            logger.warning(f"Recreate table {table.name}: its schema differs from the model")
+            table.drop(conn)
+
+
+async def _create_all() -> None:
+    global _init_task
+    try:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(_drop_outdated_tables)
+            await conn.run_sync(models.Base.metadata.create_all)
+    except BaseException:
+        # Do not cache the failure, so the next caller (e.g. after reconnect) retries.
+        _init_task = None
+        raise
+
+
+def init_db() -> "asyncio.Future[None]":
+    """Create tables once per process.
+
+    Every caller awaits the same task, so coroutines starting concurrently do not race on `CREATE TABLE`.
+    A database file left by a previous run is reused, except tables whose schema is outdated, which are recreated.
+    If creation fails, the task is dropped and the next call retries.
+
+    Returns:
+        asyncio.Future[None]: awaitable which finishes when tables are created.
+    """
+    global _init_task
+    if _init_task is None:
+        _init_task = asyncio.ensure_future(_create_all())
+    return _init_task
+
+
+async def clear_db(table_names: Optional[List[str]] = None) -> None:
+    """Delete all rows of tables, keeping the schema (e.g. before reconnecting).
+
+    Args:
+        table_names (Optional[List[str]], optional): tables to clear. Defaults to None (every table).
+    """
+    await init_db()
+    async with async_engine.begin() as conn:
+        for table in reversed(models.Base.metadata.sorted_tables):
+            if table_names is None or table.name in table_names:
+                await conn.execute(table.delete())
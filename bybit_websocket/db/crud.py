@@ -1,8 +1,10 @@
 from typing import Dict, List, Optional, Union
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from . import schemas, models
+from venues.events import BookDelta, Trade
 
 # Board methods
 def get_whole_board(db: Session) -> List[schemas.Board]:
@@ -34,55 +36,54 @@ def get_board(db: Session, symbol: str, side: str) -> List[schemas.Board]:
     return db.query(models.Board).filter(and_(models.Board.symbol == symbol, models.Board.side == side)).order_by(models.Board.price).all()
 
 
-def get_board_item(db: Session, id: str) -> schemas.Board:
-    """get board item (row) by id
-
-    Args:
-        db (Session): [Session of sqlalchemy.]
-        id (str): [id]
+def board_item_id(symbol: str, side: str, price: float) -> str:
+    """id of a board item of normalized board levels (keyed by symbol, side and price)."""
+    return f"{symbol}:{side}:{price}"
 
-    Returns:
-        schemas.Board: Board item.
-    """
-    return db.query(models.Board).filter(models.Board.id == id).first()
 
+def apply_book_delta(db: Session, delta: BookDelta) -> None:
+    """[Apply a normalized board delta (or snapshot). Levels of size 0 are deleted.]
 
-def insert_board_items(db: Session, insert_items: List[Dict]) -> None:
-    """[Insert Board items from delta or snapshot responce of bybit websocket.]
+    A snapshot replaces the rows of the symbol with a bulk insert. A delta deletes and upserts levels by id,
+    so neither runs a SELECT per level.
 
     Args:
         db (Session): [Session of sqlalchemy]
-        snapshot_items (List[schemas.BoardCreate.dict): [items of snapshot]
+        delta (BookDelta): [board delta translated by a venue adapter]
     """
-    board_items = [models.Board(**item) for item in insert_items]
-    db.add_all(board_items)
-    db.commit()
-
-
-def update_board_items(db: Session, update_items: List[Dict]) -> None:
-    """[Update Board items from delta format responce of bybit websocket.]
-
-    Args:
-        db (Session): [Session of sqlalchemy]
-        update_items (List[schemas.Board]): [items to update.]
-    """
-    for item in update_items:
-        db.query(models.Board).filter(models.Board.id == item["id"]).update(item)
+    # id -> row (or None to delete). The last level of the same id wins.
+    rows: Dict[str, Optional[Dict]] = {}
+    for side, levels in (("Buy", delta.bids), ("Sell", delta.asks)):
+        for price, size in levels:
+            id = board_item_id(delta.symbol, side, price)
+            rows[id] = dict(id=id, price=price, symbol=delta.symbol, side=side, size=size) if size != 0 else None
+    upsert_rows = [row for row in rows.values() if row is not None]
+
+    if delta.is_snapshot:
+        db.query(models.Board).filter(models.Board.symbol == delta.symbol).delete(synchronize_session=False)
+        db.add_all([models.Board(**row) for row in upsert_rows])
+    else:
+        delete_ids = [id for id, row in rows.items() if row is None]
+        if len(delete_ids) > 0:
+            db.query(models.Board).filter(models.Board.id.in_(delete_ids)).delete(synchronize_session=False)
+        if len(upsert_rows) > 0:
+            stmt = sqlite_insert(models.Board).values(upsert_rows)
+            db.execute(stmt.on_conflict_do_update(index_elements=[models.Board.id], set_={"size": stmt.excluded.size}))
 
     db.commit()
 
 
-def delete_board_items(db: Session, delete_items: List[Dict]) -> None:
-    """[Delete Board items from delta format respone of bybit websocket.]
+def get_board_item(db: Session, id: str) -> schemas.Board:
+    """get board item (row) by id
 
     Args:
-        db (Session): [Session of sqlalchemy]
-        delete_items (List[schemas.Board]): [items to be deleted.]
-    """
-    for item in delete_items:
-        db.query(models.Board).filter(models.Board.id == item["id"]).delete()
+        db (Session): [Session of sqlalchemy.]
+        id (str): [id]
 
-    db.commit()
+    Returns:
+        schemas.Board: Board item.
+    """
+    return db.query(models.Board).filter(models.Board.id == id).first()
 
 
 # Tick methods
@@ -139,7 +140,14 @@ def delete_tick_items(db: Session, delete_items: List[schemas.Tick]) -> None:
     db.commit()
 
 
-def insert_tick_items(db: Session, insert_items: List[Dict], max_rows: int = 100):
+def insert_tick_items(db: Session, insert_items: List[Trade], max_rows: int = 100):
+    """Insert normalized trades and delete older rows over `max_rows`.
+
+    Args:
+        db (Session): Session of sqlalchemy
+        insert_items (List[Trade]): trades translated by a venue adapter.
+        max_rows (int, optional): max rows of tick table. Defaults to 100.
+    """
     # Delete older items
     count_ticks = _count_ticks(db)
     if count_ticks + len(insert_items) - 1 > max_rows:
@@ -148,7 +156,7 @@ def insert_tick_items(db: Session, insert_items: List[Dict], max_rows: int = 100
         delete_tick_items(db=db, delete_items=delete_items)
     
     # insert new tick data
-    tick_items = [models.Tick(id=item["trade_id"], symbol=item["symbol"], price=item["price"], timestamp=int(item["trade_time_ms"]), size=item["size"]) for item in insert_items]
+    tick_items = [models.Tick(id=item.id, symbol=item.symbol, price=item.price, timestamp=item.timestamp, size=item.size) for item in insert_items]
     db.add_all(tick_items)
     db.commit()
 
@@ -166,17 +174,18 @@ def _count_ohlcv(db: Session) -> int:
     return db.query(models.OHLCV).count()
 
 
-def _check_if_ohclv_stored(db: Session, timestamp: int) -> bool:
+def _check_if_ohclv_stored(db: Session, symbol: str, timestamp: int) -> bool:
     """Check if the data has stored in ohlcv table
 
     Args:
         db (Session): Session of sqlalchemy
-        timestamp (int): timestamp (id)
+        symbol (str): name of symbol
+        timestamp (int): timestamp
 
     Returns:
         bool: Return true if exists.
     """
-    count_item = db.query(models.OHLCV).filter(models.OHLCV.timestamp == timestamp).count()
+    count_item = db.query(models.OHLCV).filter(models.OHLCV.symbol == symbol, models.OHLCV.timestamp == timestamp).count()
     return True if count_item == 1 else False
 
 
@@ -236,6 +245,8 @@ def get_ohlcv(db: Session, limit: Optional[int] = None, ascending: bool = True)
 def insert_ohlcv_items(db: Session, insert_items: List[schemas.OHLCVCreate], max_rows: int = 100) -> None:
     """Insert ohlcv items
 
+    A bar which is already stored (e.g. finalized again after a restart) is overwritten, keyed by (symbol, timestamp).
+
     Args:
         db (Session): Session of sqlalchemy
         insert_items (List[Union[Dict, schemas.OHLCV]]): List of ohlcv items.
@@ -247,12 +258,14 @@ def insert_ohlcv_items(db: Session, insert_items: List[schemas.OHLCVCreate], max
         delete_items = get_ohlcv(db=db, limit=query_limit, ascending=True)
         delete_ohlcv_items(db=db, delete_items=delete_items)
 
-    ohlcv_items = []
-    for item in insert_items:
-        item = models.OHLCV(**item.dict())
-        ohlcv_items.append(item)
-
-    db.add_all(ohlcv_items)
+    if len(insert_items) > 0:
+        stmt = sqlite_insert(models.OHLCV).values([item.dict() for item in insert_items])
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[models.OHLCV.symbol, models.OHLCV.timestamp],
+                set_={name: stmt.excluded[name] for name in ("open", "high", "low", "close", "volume")},
+            )
+        )
     db.commit()
 
 
@@ -264,7 +277,7 @@ def update_ohlcv_items(db: Session, update_items: List[schemas.OHLCV]) -> None:
         update_items (List[schemas.OHLCV]): update ohlcv items.
     """
     for item in update_items:
-        db.query(models.OHLCV).filter(models.OHLCV.timestamp == item.timestamp).update(item.dict())
+        db.query(models.OHLCV).filter(models.OHLCV.symbol == item.symbol, models.OHLCV.timestamp == item.timestamp).update(item.dict())
 
     db.commit()
 
@@ -272,9 +285,9 @@ def update_ohlcv_items(db: Session, update_items: List[schemas.OHLCV]) -> None:
 def delete_ohlcv_items(db: Session, delete_items: List[Union[Dict, schemas.OHLCV]]) -> None:
     for item in delete_items:
         if isinstance(item, Dict):
-            db.query(models.OHLCV).filter(models.OHLCV.timestamp == item["timestamp"]).delete()
+            db.query(models.OHLCV).filter(models.OHLCV.symbol == item["symbol"], models.OHLCV.timestamp == item["timestamp"]).delete()
         else:
-            db.query(models.OHLCV).filter(models.OHLCV.timestamp == item.timestamp).delete()
+            db.query(models.OHLCV).filter(models.OHLCV.symbol == item.symbol, models.OHLCV.timestamp == item.timestamp).delete()
 
     db.commit()
 
@@ -310,7 +323,7 @@ def create_ohlcv_from_ticks(db: Session, symbol: str, max_rows: int = 100) -> No
     ohlcv_update_items = []
     for item in ohlcv_items:
         ohlcv_model = schemas.OHLCVCreate(open=item[0], high=item[1], low=item[2], close=item[3], volume=item[4], timestamp=item[6], symbol=symbol)
-        if _check_if_ohclv_stored(db, timestamp=ohlcv_model.timestamp) is True:
+        if _check_if_ohclv_stored(db, symbol=symbol, timestamp=ohlcv_model.timestamp) is True:
             ohlcv_update_items.append(ohlcv_model)
         else:
             ohlcv_insert_items.append(ohlcv_model)
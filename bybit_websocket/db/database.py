@@ -1,4 +1,5 @@
 import sqlalchemy
+import sqlalchemy.orm
 
 # engine = sqlalchemy.create_engine("sqlite:///:memory:")
 engine = sqlalchemy.create_engine("sqlite:///example.db")
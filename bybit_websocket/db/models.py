@@ -6,7 +6,7 @@ from db.database import Base
 class Board(Base):
     __tablename__ = "board"
 
-    id = Column(String(10), primary_key=True, index=True)
+    id = Column(String(100), primary_key=True, index=True)
     price = Column(Float, index=True)
     symbol = Column(String(10), index=True)
     side = Column(String(10), index=True)
@@ -29,8 +29,9 @@ class Tick(Base):
 class OHLCV(Base):
     __tablename__ = "ohlcv"
 
+    # Bars of different symbols share open times, so a bar is keyed by (symbol, timestamp).
+    symbol = Column(String(10), primary_key=True, index=True)
     timestamp = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String(10), index=True)
     open = Column(Float)
     high = Column(Float)
     low = Column(Float)
@@ -0,0 +1,127 @@
+from collections import defaultdict, deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from bars import Bar
+from venues.events import BookDelta, Trade
+
+# Candle intervals (seconds) kept in memory.
+DEFAULT_INTERVALS = (5, 60)
+
+# Same as `db.schemas.sides`. `db.schemas` is not imported to keep pydantic out of the collector startup.
+SIDES = ("Buy", "Sell")
+
+
+class MarketState:
+    """In-memory market data of the collector (board, recent trades and candles per symbol).
+
+    Every update bumps the version of the updated (kind, symbol), so readers (e.g. `read_service`)
+    can tell whether their cached responses are stale without comparing the data itself.
+    """
+
+    def __init__(self, intervals: Iterable[int] = DEFAULT_INTERVALS, max_trades: int = 1000, max_candles: int = 1000) -> None:
+        self.intervals = tuple(intervals)
+        # symbol -> side -> price -> size
+        self.boards: Dict[str, Dict[str, Dict[float, float]]] = defaultdict(lambda: {side: {} for side in SIDES})
+        # symbol -> recent trades
+        self.trades: Dict[str, Deque[Trade]] = defaultdict(lambda: deque(maxlen=max_trades))
+        # (symbol, interval) -> candles in ascending order of time
+        self.candles: Dict[Tuple[str, int], Deque[Bar]] = defaultdict(lambda: deque(maxlen=max_candles))
+        # symbol -> stats of the bar builder (emission lag of finalized bars and dropped trades)
+        self.bar_stats: Dict[str, Dict[str, int]] = {}
+        self.versions: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    # Read methods use `.get` so that requests for unknown symbols do not create state.
+    def version(self, kind: str, symbol: str) -> int:
+        return self.versions.get((kind, symbol), 0)
+
+    def _bump(self, kind: str, symbol: str) -> None:
+        self.versions[(kind, symbol)] += 1
+
+    # Board methods
+    def apply_book_delta(self, delta: BookDelta) -> None:
+        """Apply a normalized board delta (or snapshot)."""
+        bids, asks = self.boards[delta.symbol]["Buy"], self.boards[delta.symbol]["Sell"]
+        if delta.is_snapshot:
+            bids.clear()
+            asks.clear()
+        for levels, board in ((delta.bids, bids), (delta.asks, asks)):
+            for price, size in levels:
+                if size == 0:
+                    board.pop(price, None)
+                else:
+                    board[price] = size
+        self._bump("board", delta.symbol)
+
+    def clear_boards(self) -> None:
+        for symbol, board in self.boards.items():
+            board["Buy"].clear()
+            board["Sell"].clear()
+            self._bump("board", symbol)
+
+    def get_board(self, symbol: str, side: str, depth: int) -> List[Tuple[float, float]]:
+        """Get top `depth` (price, size) of a side. Bids are in descending and asks are in ascending order of price.
+
+        Raises:
+            ValueError: raise error if `side` is invalid
+        """
+        if side not in SIDES:
+            raise ValueError(f"Invalid side {side}. side should be in {SIDES}")
+
+        board = self.boards.get(symbol)
+        if board is None:
+            return []
+        levels = sorted(board[side].items(), reverse=(side == "Buy"))
+        return levels[:depth]
+
+    # Tick methods
+    def add_trades(self, trades: List[Trade]) -> None:
+        """Add normalized trades and update candles of every interval."""
+        for trade in trades:
+            self.trades[trade.symbol].append(trade)
+            for interval in self.intervals:
+                self._update_candle(trade.symbol, interval, trade.timestamp, trade.price, trade.size)
+            self._bump("trade", trade.symbol)
+            self._bump("candle", trade.symbol)
+
+    def get_trades(self, symbol: str, limit: int) -> List[Trade]:
+        """Get the newest `limit` trades in ascending order of time."""
+        trades = self.trades.get(symbol, ())
+        return list(trades)[-limit:] if limit < len(trades) else list(trades)
+
+    # OHLCV methods
+    def _update_candle(self, symbol: str, interval: int, timestamp: int, price: float, size: float) -> None:
+        candles = self.candles[(symbol, interval)]
+        open_time = timestamp - timestamp % (interval * 1000)
+
+        # Ticks mostly belong to the newest candle, so search from the end.
+        for candle in reversed(candles):
+            if candle.timestamp == open_time:
+                candle.add(timestamp, price, size)
+                return
+            if candle.timestamp < open_time:
+                break
+
+        if len(candles) == 0 or candles[-1].timestamp < open_time:
+            candles.append(Bar(open_time, timestamp, price, size))
+        # A late tick which does not belong to any stored candle is dropped.
+
+    def set_bar_stats(self, symbol: str, last_lag_ms: int, max_lag_ms: int, dropped_trades: int) -> None:
+        """Publish the stats of the bar builder of a symbol."""
+        self.bar_stats[symbol] = {"last_lag_ms": last_lag_ms, "max_lag_ms": max_lag_ms, "dropped_trades": dropped_trades}
+        self._bump("bar_stats", symbol)
+
+    def get_bar_stats(self, symbol: str) -> Optional[Dict[str, int]]:
+        return self.bar_stats.get(symbol)
+
+    def get_candles(self, symbol: str, interval: int, limit: int) -> List[List]:
+        """Get the newest `limit` candles ([timestamp, open, high, low, close, volume]) in ascending order of time.
+
+        Raises:
+            ValueError: raise error if `interval` is not tracked.
+        """
+        if interval not in self.intervals:
+            raise ValueError(f"Invalid interval {interval}. interval should be in {self.intervals}")
+
+        candles = self.candles.get((symbol, interval), ())
+        candles = list(candles)[-limit:] if limit < len(candles) else list(candles)
+        return [[candle.timestamp, candle.open, candle.high, candle.low, candle.close, candle.volume] for candle in candles]
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import logging
+from typing import Callable, Dict, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from market_state import MarketState
+
+logger = logging.getLogger(__name__)
+
+MAX_LIMIT = 1000
+
+
+class BadRequestError(Exception):
+    pass
+
+
+class ReadService:
+    """Local HTTP read service over `MarketState`.
+
+    Endpoints (all GET, JSON responses):
+        /candles?symbol=BTCUSDT&interval=5&limit=100
+        /book?symbol=BTCUSDT&depth=25
+        /trades?symbol=BTCUSDT&limit=100
+        /bar_stats?symbol=BTCUSDT (emission lag of finalized bars, null until a bar is finalized)
+
+    Serialized responses are cached with the version of the (kind, symbol) they were built from.
+    A cached response is reused until the market state of that kind and symbol is updated, so any number
+    of pollers cost one serialization per update instead of one per request.
+    """
+
+    def __init__(self, market_state: MarketState, host: str = "127.0.0.1", port: int = 8080, max_cache_items: int = 1024) -> None:
+        self.market_state = market_state
+        self.host = host
+        self.port = port
+        self.max_cache_items = max_cache_items
+        # (path, normalized params) -> (version, response body)
+        self._cache: Dict[Tuple, Tuple[int, bytes]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # path -> (kind of market state, params normalizer, payload builder)
+        self._routes: Dict[str, Tuple[str, Callable[[Dict[str, str]], Tuple], Callable[..., Dict]]] = {
+            "/candles": ("candle", self._candles_params, self._candles),
+            "/book": ("board", self._book_params, self._book),
+            "/trades": ("trade", self._trades_params, self._trades),
+            "/bar_stats": ("bar_stats", self._bar_stats_params, self._bar_stats),
+        }
+
+    async def start(self) -> asyncio.AbstractServer:
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        logger.info(f"Read service is listening on http://{self.host}:{self.port}")
+        return server
+
+    # Params normalizers. The normalized params are a part of the cache key.
+    @staticmethod
+    def _int_param(params: Dict[str, str], name: str, default: int) -> int:
+        try:
+            value = int(params.get(name, default))
+        except ValueError:
+            raise BadRequestError(f"`{name}` should be integer.")
+        if value < 1:
+            raise BadRequestError(f"`{name}` should be more than 1.")
+        return min(value, MAX_LIMIT)
+
+    def _candles_params(self, params: Dict[str, str]) -> Tuple:
+        interval = self._int_param(params, "interval", self.market_state.intervals[0])
+        if interval not in self.market_state.intervals:
+            raise BadRequestError(f"Invalid interval {interval}. interval should be in {self.market_state.intervals}")
+        return params["symbol"], interval, self._int_param(params, "limit", 100)
+
+    def _book_params(self, params: Dict[str, str]) -> Tuple:
+        return params["symbol"], self._int_param(params, "depth", 25)
+
+    def _trades_params(self, params: Dict[str, str]) -> Tuple:
+        return params["symbol"], self._int_param(params, "limit", 100)
+
+    def _bar_stats_params(self, params: Dict[str, str]) -> Tuple:
+        return (params["symbol"],)
+
+    # Payload builders
+    def _candles(self, symbol: str, interval: int, limit: int) -> Dict:
+        keys = ("timestamp", "open", "high", "low", "close", "volume")
+        candles = self.market_state.get_candles(symbol, interval=interval, limit=limit)
+        return {"symbol": symbol, "interval": interval, "candles": [dict(zip(keys, candle)) for candle in candles]}
+
+    def _book(self, symbol: str, depth: int) -> Dict:
+        return {
+            "symbol": symbol,
+            "bids": self.market_state.get_board(symbol, side="Buy", depth=depth),
+            "asks": self.market_state.get_board(symbol, side="Sell", depth=depth),
+        }
+
+    def _trades(self, symbol: str, limit: int) -> Dict:
+        trades = self.market_state.get_trades(symbol, limit=limit)
+        return {
+            "symbol": symbol,
+            "trades": [{"timestamp": trade.timestamp, "id": trade.id, "price": trade.price, "size": trade.size, "side": trade.side} for trade in trades],
+        }
+
+    def _bar_stats(self, symbol: str) -> Dict:
+        return {"symbol": symbol, "stats": self.market_state.get_bar_stats(symbol)}
+
+    def get(self, target: str) -> Tuple[int, bytes]:
+        """Build (or reuse the cached) response of a request target.
+
+        Args:
+            target (str): request target, e.g. `/book?symbol=BTCUSDT`
+
+        Returns:
+            Tuple[int, bytes]: status code and response body.
+        """
+        url = urlsplit(target)
+        if url.path not in self._routes:
+            return 404, b'{"error": "not found"}'
+
+        params = dict(parse_qsl(url.query))
+        if "symbol" not in params:
+            return 400, b'{"error": "`symbol` is required."}'
+
+        kind, normalize, build = self._routes[url.path]
+        try:
+            normalized_params = normalize(params)
+        except BadRequestError as e:
+            return 400, json.dumps({"error": str(e)}).encode()
+
+        version = self.market_state.version(kind, params["symbol"])
+        cache_key = (url.path, normalized_params)
+        cached = self._cache.get(cache_key)
+        if cached is not None and cached[0] == version:
+            self.cache_hits += 1
+            return 200, cached[1]
+
+        self.cache_misses += 1
+
+        body = json.dumps(build(*normalized_params)).encode()
+        if len(self._cache) >= self.max_cache_items and cache_key not in self._cache:
+            self._cache.clear()
+        self._cache[cache_key] = (version, body)
+        return 200, body
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                keep_alive = True
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    if header.lower().startswith(b"connection:") and b"close" in header.lower():
+                        keep_alive = False
+
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    status, body = 400, b'{"error": "bad request"}'
+                    keep_alive = False
+                elif parts[0] != "GET":
+                    status, body = 405, b'{"error": "method not allowed"}'
+                else:
+                    status, body = self.get(parts[1])
+
+                self._write_response(writer, status, body, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, body: bytes, keep_alive: bool) -> None:
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+        header = (
+            f"HTTP/1.1 {status} {reasons[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(header.encode() + body)
+
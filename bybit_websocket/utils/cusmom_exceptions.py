@@ -1,2 +1,6 @@
 class ConnectionFailedError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class UnexpectedMessageError(Exception):
+    pass
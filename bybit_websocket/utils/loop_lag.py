@@ -0,0 +1,46 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+
+class LoopLagMonitor:
+    """Measure event loop lag.
+
+    The monitor sleeps `interval` seconds repeatedly and records how late it is woken up.
+    If a coroutine blocks the event loop (e.g. sync DB I/O), the lag grows by the blocking time.
+    """
+
+    def __init__(self, interval: float = 0.1) -> None:
+        self.interval = interval
+        self.samples = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+
+    @property
+    def mean_lag(self) -> float:
+        return self.total_lag / self.samples if self.samples > 0 else 0.0
+
+    def reset(self) -> None:
+        self.samples = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+
+    async def run(self, logger: Optional[logging.Logger] = None, report_every: int = 100) -> None:
+        """Run forever. Log the lag stats every `report_every` samples if `logger` is given.
+
+        Args:
+            logger (Optional[logging.Logger], optional): logger to report. Defaults to None.
+            report_every (int, optional): the number of samples between reports. Defaults to 100.
+        """
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - start - self.interval, 0.0)
+            self.samples += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+
+            if logger is not None and self.samples % report_every == 0:
+                logger.info(f"Event loop lag (mean, max): ({self.mean_lag * 1000:.2f}ms, {self.max_lag * 1000:.2f}ms)")
+                self.reset()
@@ -0,0 +1,64 @@
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+
+class SamplingProfiler:
+    """Sample the call stack of a thread for a bounded window and write collapsed stacks.
+
+    The output (`frame;frame;frame count` per line) can be rendered by flamegraph.pl or speedscope.
+    Sampling runs in a daemon thread, so the profiled thread is not instrumented.
+    The output is written when the window ends or `stop` is called, whichever comes first.
+
+    Args:
+        duration (float): profiling window (seconds).
+        output_path (str): path of the collapsed stacks file.
+        interval (float, optional): sampling interval (seconds). Defaults to 0.005.
+        thread_id (Optional[int], optional): thread to profile. Defaults to the thread calling `start`.
+    """
+
+    def __init__(self, duration: float, output_path: str, interval: float = 0.005, thread_id: Optional[int] = None) -> None:
+        self.duration = duration
+        self.output_path = output_path
+        self.interval = interval
+        self.thread_id = thread_id
+        self.samples: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def start(self) -> None:
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if len(stack) > 0:
+            self.samples[";".join(reversed(stack))] += 1
+
+    def _run(self) -> None:
+        stop_at = time.perf_counter() + self.duration
+        while time.perf_counter() < stop_at and not self._stop_event.is_set():
+            self._sample()
+            self._stop_event.wait(self.interval)
+        self.write()
+
+    def stop(self) -> None:
+        """End the window early (e.g. on exit) and wait until the collapsed stacks are written."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+
+    def write(self) -> None:
+        with open(self.output_path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
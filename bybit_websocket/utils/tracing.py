@@ -0,0 +1,113 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class _NullSpan:
+    """Span used while tracing is disabled. A single shared instance, so a disabled span costs one method call."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *args) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start_ns")
+
+    def __init__(self, tracer: "Tracer", name: str) -> None:
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start_ns = time.perf_counter_ns()
+
+    def __exit__(self, *args) -> None:
+        self.tracer.record(self.name, self.start_ns, time.perf_counter_ns())
+
+
+class Tracer:
+    """Opt-in tracer which keeps spans in an in-memory ring buffer.
+
+    Spans are recorded per asyncio task (shown as threads in the trace viewer) and can be dumped as
+    Chrome trace JSON (chrome://tracing, Perfetto, speedscope).
+
+    Args:
+        capacity (int, optional): the number of spans kept. Older spans are overwritten. Defaults to 100000.
+            The buffer is allocated by `enable`, so an unused tracer costs no memory.
+    """
+
+    def __init__(self, capacity: int = 100000) -> None:
+        self.enabled = False
+        self.capacity = capacity
+        # (name, track id, start ns, end ns)
+        self._buffer: List[Optional[Tuple[str, int, int, int]]] = []
+        self._index = 0
+        # track name (coroutine or thread name) -> track id. Keyed by name, so a task restarted on reconnect
+        # reuses its track and the dict does not grow with the number of tasks.
+        self._tracks: Dict[str, int] = {}
+
+    def enable(self, capacity: Optional[int] = None) -> None:
+        if capacity is not None:
+            self.capacity = capacity
+        if len(self._buffer) != self.capacity:
+            self._buffer = [None] * self.capacity
+            self._index = 0
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def span(self, name: str):
+        """Context manager which records the time spent in the block as a span named `name`."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def _track(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        track_name = task.get_coro().__qualname__ if task is not None else threading.current_thread().name
+        track_id = self._tracks.get(track_name)
+        if track_id is None:
+            track_id = len(self._tracks) + 1
+            self._tracks[track_name] = track_id
+        return track_id
+
+    def record(self, name: str, start_ns: int, end_ns: int) -> None:
+        self._buffer[self._index % self.capacity] = (name, self._track(), start_ns, end_ns)
+        self._index += 1
+
+    def spans(self) -> List[Tuple[str, int, int, int]]:
+        """Get recorded spans (name, track id, start ns, end ns) in order of record."""
+        if self._index <= self.capacity:
+            return self._buffer[:self._index]
+        start = self._index % self.capacity
+        return self._buffer[start:] + self._buffer[:start]
+
+    def chrome_trace(self) -> Dict:
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": track_id, "args": {"name": track_name}}
+            for track_name, track_id in self._tracks.items()
+        ]
+        for name, track_id, start_ns, end_ns in self.spans():
+            events.append({"name": name, "ph": "X", "pid": 1, "tid": track_id, "ts": start_ns / 1000, "dur": (end_ns - start_ns) / 1000})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump_chrome_trace(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+# Tracer shared by the collector.
+tracer = Tracer()
@@ -0,0 +1,41 @@
+from abc import ABC, abstractmethod
+from typing import List, Union
+
+from venues.events import Event
+
+
+class VenueAdapter(ABC):
+    """Base class of venue adapters.
+
+    An adapter knows the websocket url, subscribe messages and topics of a venue, and translates its
+    raw frames into normalized events (`venues.events`) in a single pass.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def public_url(self) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def subscribe_message(self, topics: List[str]) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def trades_topic(self, symbol: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def book_topic(self, symbol: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def parse(self, message: Union[str, bytes]) -> List[Event]:
+        """Translate a raw frame into normalized events.
+
+        Control frames (e.g. subscribe responce) are translated into an empty list.
+
+        Raises:
+            UnexpectedMessageError: raise error if the frame is neither data nor control frame, or reports a failed request.
+        """
+        raise NotImplementedError
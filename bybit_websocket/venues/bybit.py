@@ -0,0 +1,75 @@
+import json
+from typing import List, Optional, Union
+
+from bybit_ws import BybitWebSocket
+from utils.cusmom_exceptions import UnexpectedMessageError
+from venues.base import VenueAdapter
+from venues.events import BookDelta, Event, Trade
+
+
+class BybitAdapter(VenueAdapter):
+    """Adapter of bybit legacy public streams (`realtime_public`, `trade.*` and `orderBookL2_25.*`).
+
+    Args:
+        bybit_ws (Optional[BybitWebSocket]): client which builds the url and topics. Can be None when only `parse`
+            is used (e.g. replaying captured frames). Other methods raise ValueError without it.
+    """
+
+    name = "bybit"
+
+    def __init__(self, bybit_ws: Optional[BybitWebSocket]) -> None:
+        self.bybit_ws = bybit_ws
+
+    def _client(self) -> BybitWebSocket:
+        if self.bybit_ws is None:
+            raise ValueError("BybitAdapter has no BybitWebSocket client. Only `parse` can be used without it.")
+        return self.bybit_ws
+
+    def public_url(self) -> str:
+        return self._client()._ws_public_url()
+
+    def subscribe_message(self, topics: List[str]) -> str:
+        return self._client().subscribe_topic(topics)
+
+    def trades_topic(self, symbol: str) -> str:
+        return self._client()._ticks(symbol)
+
+    def book_topic(self, symbol: str) -> str:
+        return self._client()._orderbookL2_25(symbol)
+
+    def parse(self, message: Union[str, bytes]) -> List[Event]:
+        res = json.loads(message)
+        topic = res.get("topic")
+        if topic is None:
+            if res.get("success") is True:
+                # Subscribe (or ping) responce
+                return []
+            if "success" in res:
+                raise UnexpectedMessageError(f"Request failed: {res.get('ret_msg')} ({res})")
+            raise UnexpectedMessageError(f"responce dont have any key of [`success`, `topic`]: {res}")
+
+        if topic.startswith("trade."):
+            return [
+                Trade(item["symbol"], item["trade_id"], int(item["trade_time_ms"]), float(item["price"]), float(item["size"]), item["side"])
+                for item in res["data"]
+            ]
+
+        if topic.startswith("orderBookL2_25."):
+            symbol = topic[len("orderBookL2_25."):]
+            timestamp = int(res["timestamp_e6"]) // 1000
+            bids, asks = [], []
+            if res["type"] == "snapshot":
+                for item in res["data"]["order_book"]:
+                    (bids if item["side"] == "Buy" else asks).append((float(item["price"]), float(item["size"])))
+                return [BookDelta(symbol, timestamp, True, bids, asks)]
+
+            if res["type"] == "delta":
+                data = res["data"]
+                for item in data["delete"]:
+                    (bids if item["side"] == "Buy" else asks).append((float(item["price"]), 0.0))
+                for items in (data["update"], data["insert"]):
+                    for item in items:
+                        (bids if item["side"] == "Buy" else asks).append((float(item["price"]), float(item["size"])))
+                return [BookDelta(symbol, timestamp, False, bids, asks)]
+
+        raise UnexpectedMessageError(f"Unexpected responce: {res}")
@@ -0,0 +1,63 @@
+import json
+from typing import List, Union
+
+from utils.cusmom_exceptions import UnexpectedMessageError
+from venues.base import VenueAdapter
+from venues.events import BookDelta, Event, Trade
+
+
+class BybitV5Adapter(VenueAdapter):
+    """Adapter of bybit v5 public streams (`publicTrade.*` and `orderbook.{depth}.*`).
+
+    Args:
+        category (str, optional): linear, inverse, spot or option. Defaults to "linear".
+        depth (int, optional): depth of orderbook topic. Defaults to 50.
+        base_url (str, optional): base url of websocket. Defaults to "wss://stream.bybit.com".
+    """
+
+    name = "bybit_v5"
+
+    def __init__(self, category: str = "linear", depth: int = 50, base_url: str = "wss://stream.bybit.com") -> None:
+        self.category = category
+        self.depth = depth
+        self.base_url = base_url
+
+    def public_url(self) -> str:
+        return f"{self.base_url}/v5/public/{self.category}"
+
+    def subscribe_message(self, topics: List[str]) -> str:
+        return json.dumps({"op": "subscribe", "args": topics})
+
+    def trades_topic(self, symbol: str) -> str:
+        return f"publicTrade.{symbol}"
+
+    def book_topic(self, symbol: str) -> str:
+        return f"orderbook.{self.depth}.{symbol}"
+
+    def parse(self, message: Union[str, bytes]) -> List[Event]:
+        res = json.loads(message)
+        topic = res.get("topic")
+        if topic is None:
+            if res.get("success") is True:
+                # Subscribe (or pong) responce
+                return []
+            if "success" in res:
+                raise UnexpectedMessageError(f"Request failed: {res.get('ret_msg')} ({res})")
+            raise UnexpectedMessageError(f"responce dont have any key of [`success`, `topic`]: {res}")
+
+        if topic.startswith("publicTrade."):
+            return [Trade(item["s"], item["i"], int(item["T"]), float(item["p"]), float(item["v"]), item["S"]) for item in res["data"]]
+
+        if topic.startswith("orderbook."):
+            data = res["data"]
+            return [
+                BookDelta(
+                    data["s"],
+                    int(res["ts"]),
+                    res["type"] == "snapshot",
+                    [(float(price), float(size)) for price, size in data["b"]],
+                    [(float(price), float(size)) for price, size in data["a"]],
+                )
+            ]
+
+        raise UnexpectedMessageError(f"Unexpected responce: {res}")
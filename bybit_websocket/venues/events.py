@@ -0,0 +1,31 @@
+from typing import List, NamedTuple, Tuple, Union
+
+# Normalized market data events. Venue adapters translate raw frames into these, so the board, candle
+# and storage stages do not depend on the frame shapes of a venue.
+# timestamps are unix timestamp (ms).
+
+
+class Trade(NamedTuple):
+    symbol: str
+    id: str
+    timestamp: int
+    price: float
+    size: float
+    side: str  # Buy or Sell (taker side)
+
+
+class BookDelta(NamedTuple):
+    """Board levels changed by a message.
+
+    Levels are (price, size). Size 0 means the level is removed.
+    If `is_snapshot` is True, the levels replace the whole board of the symbol.
+    """
+
+    symbol: str
+    timestamp: int
+    is_snapshot: bool
+    bids: List[Tuple[float, float]]
+    asks: List[Tuple[float, float]]
+
+
+Event = Union[Trade, BookDelta]